@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+
+import timeit
+
+import dateutil.parser  # noqa
+
+from staticsite.utils import dates  # noqa
+
+test_dates = [
+    "2020-01-02",
+    "2020-01-02 12:00",
+    "2020-01-02 12:00:00",
+    "2020-01-02T12:00:00Z",
+    "2020-01-02 12:00:00+02:00",
+    "2020-01-02 12:00 Europe/Rome",
+]
+
+for date in test_dates:
+    val = timeit.timeit(
+        "dates.parse_date.__wrapped__(date)", number=10000, globals=globals()
+    )
+    print(f"{date!r}: fast path: {val}")
+
+    val = timeit.timeit("dates.parse_date(date)", number=10000, globals=globals())
+    print(f"{date!r}: cached: {val}")
+
+    try:
+        val = timeit.timeit(
+            "dateutil.parser.parse(date)", number=10000, globals=globals()
+        )
+    except ValueError:
+        print(f"{date!r}: dateutil: cannot parse")
+    else:
+        print(f"{date!r}: dateutil: {val}")
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import time
+
+from staticsite.features.markdown import BACKENDS, MarkdownPage
+from staticsite.settings import Settings
+from staticsite.site import Site
+
+
+def load(root: str, backend: str) -> Site:
+    settings = Settings()
+    settings.PROJECT_ROOT = root
+    if os.path.exists(settings_path := os.path.join(root, "settings.py")):
+        settings.load(settings_path)
+    settings.THEME_PATHS = [os.path.join(os.path.dirname(__file__), "..", "themes")]
+    settings.CACHE_REBUILDS = False
+    settings.MARKDOWN_BACKEND = backend
+    site = Site(settings)
+    site.load()
+    return site
+
+
+def bench(root: str, backend: str, rounds: int) -> None:
+    site = load(root, backend)
+    pages = [page for page in site.iter_pages() if isinstance(page, MarkdownPage)]
+    start = time.perf_counter()
+    for i in range(rounds):
+        site.highlight_cache.results.clear()
+        for page in pages:
+            page.rendered_fragments.clear()
+            page._render_fragments()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{root} {backend}: {len(pages)} pages,"
+        f" {elapsed / rounds * 1000:.3f}ms per render of all pages"
+    )
+
+
+parser = argparse.ArgumentParser(description="Compare markdown backends")
+parser.add_argument(
+    "sites", nargs="*", help="site directories (default: all example sites)"
+)
+parser.add_argument("--rounds", type=int, default=20, help="number of renders to time")
+args = parser.parse_args()
+
+sites = args.sites or [
+    os.path.join("example", name) for name in sorted(os.listdir("example"))
+]
+for root in sites:
+    for backend in BACKENDS:
+        bench(root, backend, args.rounds)
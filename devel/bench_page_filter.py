@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+import tempfile
+import time
+
+from staticsite.page_filter import PageFilter, compile_page_match
+from staticsite.settings import Settings
+from staticsite.site import Site
+
+
+def bench(name: str, site: Site, rounds: int, **kw) -> None:
+    start = time.perf_counter()
+    for i in range(rounds):
+        count = len(PageFilter(site, **kw).filter())
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {count} pages, {elapsed / rounds * 1000:.3f}ms per query")
+
+
+parser = argparse.ArgumentParser(description="Measure page filter query times")
+parser.add_argument("--pages", type=int, default=10000, help="number of pages to load")
+parser.add_argument("--rounds", type=int, default=20, help="number of queries to time")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory() as root:
+    with open(os.path.join(root, "index.md"), "wt") as fd:
+        fd.write("---\ntitle: Index\n---\n")
+    for i in range(args.pages):
+        dirname = os.path.join(root, "blog", str(2000 + i % 20), f"{i % 12 + 1:02d}")
+        os.makedirs(dirname, exist_ok=True)
+        with open(os.path.join(dirname, f"page{i}.md"), "wt") as fd:
+            fd.write(f"---\ntitle: Page {i}\ndate: {2000 + i % 20}-{i % 12 + 1:02d}-01 12:00\n---\n\ntext\n")
+
+    settings = Settings()
+    settings.PROJECT_ROOT = root
+    settings.THEME_PATHS = [os.path.join(os.path.dirname(__file__), "..", "themes")]
+    settings.TIMEZONE = "Europe/Rome"
+    settings.CACHE_REBUILDS = False
+    settings.LOAD_WORKERS = 1
+    settings.SITE_URL = "https://www.example.org"
+    settings.SITE_NAME = "Benchmark"
+    site = Site(settings)
+    site.load()
+
+    glob = "blog/2010/*"
+    # The same query as a regular expression, which cannot be used to prune
+    # the tree walk
+    regex = compile_page_match(glob)
+
+    index = site.page_index
+    site.page_index = None
+    bench("tree walk, regex", site, args.rounds, path=regex)
+    bench("tree walk, glob", site, args.rounds, path=glob)
+    bench("tree walk, glob, sorted", site, args.rounds, path=glob, sort="-date", limit=5)
+    site.page_index = index
+    bench("index, regex", site, args.rounds, path=regex)
+    bench("index, glob", site, args.rounds, path=glob)
+    bench("index, glob, sorted", site, args.rounds, path=glob, sort="-date", limit=5)
+    bench("index, all, sorted", site, args.rounds, sort="-date", limit=5)
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+import argparse
+import gc
+import os
+import tempfile
+
+from staticsite.settings import Settings
+from staticsite.site import Site
+
+
+def rss_kb() -> int:
+    """
+    Return the current resident set size in KiB
+    """
+    with open("/proc/self/status") as fd:
+        for line in fd:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmRSS not found in /proc/self/status")
+
+
+parser = argparse.ArgumentParser(description="Measure memory used per loaded page")
+parser.add_argument("--pages", type=int, default=20000, help="number of pages to load")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory() as root:
+    with open(os.path.join(root, "index.md"), "wt") as fd:
+        fd.write("---\ntitle: Index\n---\n")
+    for i in range(args.pages):
+        dirname = os.path.join(root, f"dir{i // 100}")
+        os.makedirs(dirname, exist_ok=True)
+        with open(os.path.join(dirname, f"page{i}.md"), "wt") as fd:
+            fd.write(f"---\ntitle: Page {i}\ndate: 2020-01-01 12:{i % 60:02d}\n---\n\ntext\n")
+
+    settings = Settings()
+    settings.PROJECT_ROOT = root
+    settings.THEME_PATHS = [os.path.join(os.path.dirname(__file__), "..", "themes")]
+    settings.TIMEZONE = "Europe/Rome"
+    settings.CACHE_REBUILDS = False
+    settings.LOAD_WORKERS = 1
+    settings.SITE_URL = "https://www.example.org"
+    settings.SITE_NAME = "Benchmark"
+    site = Site(settings)
+    site.load(until=Site.LOAD_STEP_THEME)
+
+    gc.collect()
+    before = rss_kb()
+    site.load()
+    # Access metadata as rendering would
+    for page in site.iter_pages():
+        page.meta.to_dict()
+    gc.collect()
+    after = rss_kb()
+
+    count = sum(1 for page in site.iter_pages())
+    print(f"{count} pages, {after - before} KiB: {(after - before) * 1024 / count:.0f} bytes per page")
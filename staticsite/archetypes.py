@@ -26,7 +26,7 @@ class Archetype:
         # By default, render the archetype with jinja2
         abspath = os.path.join(self.archetypes.root, self.relpath)
         with open(abspath) as fd:
-            template = self.site.theme.jinja2.from_string(fd.read())
+            template = self.site.theme.from_string(fd.read())
         rendered = template.render(**kw)
         return {}, rendered
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import os
+from collections.abc import Iterable
 from functools import cached_property
 from typing import Any, Protocol
 
@@ -23,6 +24,12 @@ class Cache(Protocol):
     def put(self, relpath: str, data: Any) -> None:
         ...
 
+    def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        ...
+
+    def delete_many(self, relpaths: Iterable[str]) -> None:
+        ...
+
 
 CacheImplementation: type[Cache]
 
@@ -52,6 +59,17 @@ if HAVE_LMDB:
             with self.db.begin(write=True) as tr:
                 tr.put(relpath.encode(), json.dumps(data).encode())
 
+        def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+            # Use a single transaction for all the items
+            with self.db.begin(write=True) as tr:
+                for relpath, data in items:
+                    tr.put(relpath.encode(), json.dumps(data).encode())
+
+        def delete_many(self, relpaths: Iterable[str]) -> None:
+            with self.db.begin(write=True) as tr:
+                for relpath in relpaths:
+                    tr.delete(relpath.encode())
+
     CacheImplementation = LMDBCache
 
 else:
@@ -77,6 +95,17 @@ else:
         def put(self, relpath: str, data: Any) -> None:
             self.db[relpath] = json.dumps(data)
 
+        def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+            for relpath, data in items:
+                self.db[relpath] = json.dumps(data)
+
+        def delete_many(self, relpaths: Iterable[str]) -> None:
+            for relpath in relpaths:
+                try:
+                    del self.db[relpath]
+                except KeyError:
+                    pass
+
     CacheImplementation = DBMCache
 
 
@@ -94,6 +123,12 @@ class DisabledCache:
     def put(self, relpath: str, data: Any) -> None:
         pass
 
+    def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        pass
+
+    def delete_many(self, relpaths: Iterable[str]) -> None:
+        pass
+
 
 class Caches:
     """
@@ -107,7 +142,19 @@ class Caches:
     def get(self, name: str) -> Cache:
         return CacheImplementation(os.path.join(self.root, name))
 
+    def get_dir(self, name: str) -> str | None:
+        """
+        Return the path to a cache directory managed by an external component,
+        creating it if needed
+        """
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
 
 class DisabledCaches:
     def get(self, name: str) -> Cache:
         return DisabledCache(name)
+
+    def get_dir(self, name: str) -> str | None:
+        return None
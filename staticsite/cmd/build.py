@@ -47,11 +47,20 @@ class Build(SiteCommand):
         parser.add_argument(
             "-f", "--full", action="store_true", help="always do a full rebuild"
         )
+        parser.add_argument(
+            "--profile-templates",
+            action="store",
+            metavar="file",
+            help="measure template rendering times, and write them to the given"
+            " file in collapsed stack format, to use with flame graph tools",
+        )
         return parser
 
     def __init__(self, *args: Any, **kw: Any) -> None:
         super().__init__(*args, **kw)
         self.site: Site
+        if self.args.profile_templates:
+            self.settings.JINJA2_PROFILE = True
 
     def run(self) -> int | None:
         self.site = self.load_site()
@@ -63,6 +72,9 @@ class Build(SiteCommand):
             full=self.args.full,
         )
         self.builder.write()
+        if (profiler := self.site.theme.template_profiler) is not None:
+            with open(self.args.profile_templates, "w") as out:
+                profiler.write_collapsed(out)
         if self.builder.has_errors:
             return 1
         return None
@@ -300,6 +312,39 @@ skip: yes
                 stats.sums[type] / 1_000_000_000,
                 stats.counts[type] / stats.sums[type] * 60 * 1_000_000_000,
             )
+        if (index := self.site.page_index) is not None:
+            log.info(
+                "page queries: %d computed, %d reused",
+                index.query_misses,
+                index.query_hits,
+            )
+        fragment_cache = self.site.theme.fragment_cache
+        if fragment_cache.hits or fragment_cache.misses:
+            log.info(
+                "template fragments: %d rendered, %d reused",
+                fragment_cache.misses,
+                fragment_cache.hits,
+            )
+        if (profiler := self.site.theme.template_profiler) is not None:
+            for name, elapsed in sorted(
+                profiler.inclusive.items(), key=lambda x: x[1], reverse=True
+            )[:10]:
+                log.info(
+                    "template %s: %d renders, %.3fs total, %.3fs excluding nested templates",
+                    name,
+                    profiler.calls[name],
+                    elapsed / 1_000_000_000,
+                    profiler.exclusive[name] / 1_000_000_000,
+                )
+        for name, count in sorted(self.site.rendered_fields.items()):
+            log.info("template_%s: rendered %d times", name, count)
+        highlight_cache = self.site.highlight_cache
+        if highlight_cache.hits or highlight_cache.misses:
+            log.info(
+                "highlighted code blocks: %d computed, %d reused",
+                highlight_cache.misses,
+                highlight_cache.hits,
+            )
 
     def write_subtree(
         self, node: Node, render_dir: RenderDirectory, stats: RenderStats
@@ -135,6 +135,22 @@ class Feature:
         """
         return []
 
+    def get_preparse_job(
+        self, fname: str, src: file.File
+    ) -> Callable[[str], Any] | None:
+        """
+        Return a picklable function that can parse the given file in a worker
+        process, before load_dir is called.
+
+        The function is called with the absolute path of the file, and its
+        result is made available in ``site.preparsed``, indexed by
+        ``(feature name, src.abspath)``.
+
+        Return None if the feature would not load this file, or if it does not
+        support parsing it in advance.
+        """
+        return None
+
     def try_load_archetype(
         self, archetypes: Archetypes, relpath: str, name: str
     ) -> Archetype | None:
@@ -347,8 +363,19 @@ class Features:
             mod = sys.modules.get(full_name)
             if not mod:
                 try:
-                    spec = module_finder.find_spec(name)
-                    if spec is None:
+                    found = module_finder.find_spec(name)
+                    if found is None or found.origin is None:
+                        log.error("spec not found for module %r", name)
+                        continue
+                    # Use the full name for the module, so that its functions
+                    # can be pickled by reference to be sent to worker
+                    # processes
+                    spec = importlib.util.spec_from_file_location(
+                        full_name,
+                        found.origin,
+                        submodule_search_locations=found.submodule_search_locations,
+                    )
+                    if spec is None or spec.loader is None:
                         log.error("spec not found for module %r", name)
                         continue
                     mod = importlib.util.module_from_spec(spec)
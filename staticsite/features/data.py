@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import functools
 import io
 import logging
 import os
 import re
 from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from typing import IO, TYPE_CHECKING, Any
 
 import jinja2
@@ -98,12 +99,17 @@ class DataPages(PageTrackingMixin["DataPageMixin"], Feature):
 
             fmt = mo.group(1)
 
-            with directory.open(fname, "rt") as fd:
-                try:
-                    fm_meta = parse_data(fd, fmt)
-                except Exception:
-                    log.exception("%s: failed to parse %s content", src.relpath, fmt)
-                    continue
+            if (
+                fm_meta := self.site.preparsed.get((self.name, src.abspath))
+            ) is None:
+                with directory.open(fname, "rt") as fd:
+                    try:
+                        fm_meta = parse_data(fd, fmt)
+                    except Exception:
+                        log.exception(
+                            "%s: failed to parse %s content", src.relpath, fmt
+                        )
+                        continue
 
             try:
                 data_type = fm_meta.get("data_type", None)
@@ -132,6 +138,13 @@ class DataPages(PageTrackingMixin["DataPageMixin"], Feature):
 
         return pages
 
+    def get_preparse_job(
+        self, fname: str, src: file.File
+    ) -> Callable[[str], Any] | None:
+        if (mo := re_ext.search(fname)) is None:
+            return None
+        return functools.partial(parse_file, fmt=mo.group(1))
+
     def try_load_archetype(
         self, archetypes: Archetypes, relpath: str, name: str
     ) -> Archetype | None:
@@ -192,6 +205,16 @@ def parse_data(fd: IO[str], fmt: str) -> Any:
         raise NotImplementedError(f"data format {fmt} is not supported")
 
 
+def parse_file(abspath: str, fmt: str) -> Any:
+    """
+    Parse a data file given its absolute path.
+
+    This is used to parse files in worker processes.
+    """
+    with open(abspath) as fd:
+        return parse_data(fd, fmt)
+
+
 def write_data(fd: IO[str], data: dict[str, Any], fmt: str) -> None:
     if fmt == "json":
         import json
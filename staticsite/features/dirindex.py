@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import logging
-import os
 from typing import TYPE_CHECKING, Any, Optional
 
 from staticsite import fields
@@ -100,9 +99,10 @@ class Dir(TemplatePage, StandaloneAutoPage):
         res = super()._compute_change_extent()
 
         # Check if pages were deleted in this dir
-        for relpath in self.site.deleted_source_pages():
-            if os.path.dirname(relpath) == self.src.relpath:
-                return ChangeExtent.ALL
+        if self.site.footprints.deleted(
+            self.src.relpath, self.node.by_src_relpath.keys()
+        ):
+            return ChangeExtent.ALL
 
         # Dir has changed if any page referenced changed in metadata
         for subdir in self.subdirs:
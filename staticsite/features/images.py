@@ -276,7 +276,7 @@ class RenderedScaledImage(RenderedElement):
         # If target exists and mtime is ok, keep it
         if old and old.st_mtime >= self.src.stat.st_mtime:
             return
-        import PIL
+        import PIL.Image
 
         with PIL.Image.open(self.src.abspath) as img:
             img = img.resize((self.width, self.height))
@@ -4,128 +4,277 @@ import io
 import logging
 import os
 import re
+from collections.abc import Callable
 from typing import IO, TYPE_CHECKING, Any, BinaryIO, cast
 
 import jinja2
-import markdown
-import markdown.treeprocessors
 import markupsafe
-from markdown.util import AMP_SUBSTITUTE
 
 from staticsite.archetypes import Archetype
 from staticsite.feature import Feature
-from staticsite.markup import MarkupFeature, MarkupPage
-from staticsite.page import FrontMatterPage, ImagePage, Page, TemplatePage
+from staticsite.footprints import digest
+from staticsite.markup import MarkupFeature, MarkupPage, MarkupRenderer
+from staticsite.page import FrontMatterPage, Page, TemplatePage
 from staticsite.utils import front_matter
 
 if TYPE_CHECKING:
-    import xml.etree.ElementTree as ET
-
     from staticsite import file, fstree
     from staticsite.archetypes import Archetypes
-    from staticsite.markup import LinkResolver
+    from staticsite.render import RenderedElement
+    from staticsite.settings import Settings
     from staticsite.source_node import SourcePageNode
+    from staticsite.utils.highlight import HighlightCache
 
 log = logging.getLogger("markdown")
 
 
-class FixURLs(markdown.treeprocessors.Treeprocessor):
+def read_file_meta(fd: IO[bytes]) -> tuple[dict[str, Any], list[str]]:
     """
-    Markdown Treeprocessor that fixes internal links in HTML tags
+    Load metadata for a file.
+
+    Returns the metadata and the markdown lines for the rest of the file
     """
+    fmt, meta, lines = front_matter.read_markdown_partial(fd)
 
-    def __init__(self, *args: Any, link_resolver: LinkResolver, **kw: Any) -> None:
-        super().__init__(*args, **kw)
-        self.link_resolver = link_resolver
-
-    def should_resolve(self, url: str) -> bool:
-        if url.startswith(AMP_SUBSTITUTE):
-            # Possibly an overencoded mailto: link.
-            # see https://bugs.debian.org/816218
-            #
-            # Markdown then further escapes & with utils.AMP_SUBSTITUTE, so
-            # we look for it here.
-            return False
-        return True
-
-    def run(self, root: ET.ElementTree) -> None:
-        # Replace <a href=…>
-        for a in root.iter("a"):
-            if (orig_url := a.attrib.get("href", None)) is None:
-                continue
+    body = list(lines)
 
-            if not self.should_resolve(orig_url):
-                continue
+    # Remove leading empty lines
+    while body and not body[0]:
+        body.pop(0)
 
-            new_url = self.link_resolver.resolve_url(orig_url)
-            if new_url is not None:
-                a.attrib["href"] = new_url
+    # Read title from first # title if not specified in metadata
+    if not meta.get("title", ""):
+        if body and body[0].startswith("# "):
+            meta["title"] = body.pop(0)[2:].strip()
 
-        # Replace <img src=…>
-        for img in root.iter("img"):
-            if (orig_url := img.attrib.get("src", None)) is None:
-                continue
+        # Remove leading empty lines again
+        while body and not body[0]:
+            body.pop(0)
 
-            if not self.should_resolve(orig_url):
-                continue
+    return meta, body
 
-            if (resolved := self.link_resolver.resolve_page(orig_url)) is None:
-                continue
 
-            if isinstance(resolved.page, ImagePage):
-                attrs = resolved.page.get_img_attributes(
-                    absolute=self.link_resolver.absolute
-                )
-            else:
-                log.warning(
-                    "%s: img src= resolves to %s which is not an image page",
-                    self.link_resolver.page,
-                    resolved.page,
-                )
-                continue
+def parse_file(abspath: str) -> tuple[dict[str, Any], list[str]]:
+    """
+    Load metadata and markdown lines for a file, given its absolute path.
 
-            img.attrib.update(attrs)
+    This is used to parse files in worker processes.
+    """
+    with open(abspath, "rb") as fd:
+        return read_file_meta(fd)
 
 
-class StaticSiteExtension(markdown.extensions.Extension):
-    def __init__(self, *, link_resolver: LinkResolver, **kwargs: Any):
-        super().__init__(**kwargs)
-        self.link_resolver = link_resolver
+# Start of a footnote in the footnotes list rendered by both backends
+re_footnote_item = re.compile(r'<li id="(fn[^"]*)"')
+# Internal link, to look for footnote references
+re_anchor_href = re.compile(r'href="#([^"]+)"')
+# Element id, to look for footnote reference anchors
+re_element_id = re.compile(r'id="([^"]+)"')
+# Link from a footnote back to where it is referenced
+re_footnote_backref = re.compile(
+    r'<a (?=[^>]*class="footnote-backref")[^>]*href="#([^"]+)"[^>]*>.*?</a>'
+)
 
-    def extendMarkdown(self, md: markdown.Markdown) -> None:
-        md.treeprocessors.register(
-            FixURLs(md, link_resolver=self.link_resolver), "staticsite", 0
-        )
-        md.registerExtension(self)
 
-    def reset(self) -> None:
-        pass
+def select_footnotes(footnotes: str, html: str) -> str:
+    """
+    Return the footnotes block with only the footnotes referenced in html, or
+    an empty string if html does not reference any footnote.
 
-    def set_page(self, page: Page, absolute: bool) -> None:
-        self.link_resolver.set_page(page, absolute)
+    Links back to references that are not in html are removed.
+    """
+    referenced = set(re_anchor_href.findall(html))
+    anchors = set(re_element_id.findall(html))
+
+    def drop_missing_backref(mo: re.Match[str]) -> str:
+        return mo.group(0) if mo.group(1) in anchors else ""
+
+    items = list(re_footnote_item.finditer(footnotes))
+    if not items or (end := footnotes.rfind("</ol>")) == -1:
+        return ""
+
+    kept: list[str] = []
+    for idx, mo in enumerate(items):
+        if mo.group(1) not in referenced:
+            continue
+        item_end = items[idx + 1].start() if idx + 1 < len(items) else end
+        item = re_footnote_backref.sub(
+            drop_missing_backref, footnotes[mo.start() : item_end]
+        )
+        if len(kept) != idx:
+            # Keep the original numbering if previous footnotes were dropped
+            item = f'<li value="{idx + 1}"' + item.removeprefix("<li")
+        kept.append(item)
 
+    if not kept:
+        return ""
+    return footnotes[: items[0].start()] + "".join(kept) + footnotes[end:]
 
-class MarkdownPages(MarkupFeature, Feature):
+
+class BaseMarkdownRenderer(MarkupRenderer):
+    """
+    Markdown converter with its own link resolver
     """
-    Render ``.md`` markdown pages, with front matter.
 
-    See doc/reference/markdown.md for details.
+    # Name of the cache used to store rendered pages
+    CACHE_NAME: str
+
+    # Start of the footnotes block in rendered HTML
+    FOOTNOTES_START: str
+
+    def __init__(self, settings: Settings, highlight_cache: HighlightCache):
+        super().__init__()
+        self.highlight_cache = highlight_cache
+
+    def convert(self, text: str) -> str:
+        """
+        Render markdown text to HTML
+        """
+        raise NotImplementedError(f"{self.__class__.__name__}.convert not implemented")
+
+
+class MarkdownRenderer(BaseMarkdownRenderer):
+    """
+    Markdown converter using python-markdown
     """
 
-    def __init__(self, *args: Any, **kw: Any):
-        super().__init__(*args, **kw)
+    CACHE_NAME = "markdown"
+    FOOTNOTES_START = '<div class="footnote">'
+
+    def __init__(self, settings: Settings, highlight_cache: HighlightCache):
+        super().__init__(settings, highlight_cache)
+        # Import here, so that python-markdown and its extensions are only
+        # loaded for sites that use them
+        import markdown
+
+        from staticsite.utils.markdown_ext import StaticSiteExtension
+
         self.markdown = markdown.Markdown(
-            extensions=self.site.settings.MARKDOWN_EXTENSIONS
+            extensions=settings.MARKDOWN_EXTENSIONS
             + [
                 StaticSiteExtension(link_resolver=self.link_resolver),
             ],
-            extension_configs=self.site.settings.MARKDOWN_EXTENSION_CONFIGS,
+            extension_configs=settings.MARKDOWN_EXTENSION_CONFIGS,
             output_format="html",
         )
 
+    def convert(self, text: str) -> str:
+        """
+        Render markdown text to HTML
+        """
+        self.markdown.reset()
+        with self.highlight_cache.use_markdown():
+            return self.markdown.convert(text)
+
+
+class MarkdownItRenderer(BaseMarkdownRenderer):
+    """
+    Markdown converter using markdown-it-py
+    """
+
+    CACHE_NAME = "markdown_it"
+    FOOTNOTES_START = '<hr class="footnotes-sep">'
+
+    def __init__(self, settings: Settings, highlight_cache: HighlightCache):
+        super().__init__(settings, highlight_cache)
+        # Import here, so that markdown-it-py is only required for sites that
+        # use it
+        from markdown_it import MarkdownIt
+        from mdit_py_plugins.deflist import deflist_plugin
+        from mdit_py_plugins.footnote import footnote_plugin
+
+        from staticsite.utils.markdown_it_ext import staticsite_plugin
+
+        self.markdown = (
+            MarkdownIt("commonmark", {"html": True, "xhtmlOut": False})
+            .enable(["table", "strikethrough"])
+            .use(footnote_plugin)
+            .use(deflist_plugin)
+            .use(
+                staticsite_plugin,
+                link_resolver=self.link_resolver,
+                highlight_cache=self.highlight_cache,
+            )
+        )
+
+    def convert(self, text: str) -> str:
+        """
+        Render markdown text to HTML
+        """
+        return self.markdown.render(text).removesuffix("\n")
+
+
+# Markdown renderers by MARKDOWN_BACKEND name
+BACKENDS: dict[str, type[BaseMarkdownRenderer]] = {
+    "python-markdown": MarkdownRenderer,
+    "markdown-it": MarkdownItRenderer,
+}
+
+
+class MarkdownPages(MarkupFeature, Feature):
+    """
+    Render ``.md`` markdown pages, with front matter.
+
+    See doc/reference/markdown.md for details.
+    """
+
+    # Maximum number of rendered snippets kept in memory
+    max_rendered_snippets = 1024
+
+    def __init__(self, *args: Any, **kw: Any):
+        super().__init__(*args, **kw)
         self.j2_filters["markdown"] = self.jinja2_markdown
 
-        self.render_cache = self.site.caches.get("markdown")
+        backend = self.site.settings.MARKDOWN_BACKEND
+        if (renderer_cls := BACKENDS.get(backend)) is None:
+            raise RuntimeError(
+                f"MARKDOWN_BACKEND: unsupported markdown backend {backend!r}"
+            )
+        self.renderer_cls = renderer_cls
+
+        self.render_cache = self.site.caches.get(renderer_cls.CACHE_NAME)
+
+        # Snippets rendered during this build, by cache key, from the least to
+        # the most recently used
+        self.rendered_snippets: dict[str, str] = {}
+
+        # Render cache keys of the snippets used by each page in this build,
+        # and in the previous build, by page site path
+        self.snippet_keys: dict[str, set[str]] = {}
+        self.previous_snippet_keys: dict[str, list[str]] = {}
+
+    def get_footprint(self) -> dict[str, Any]:
+        """
+        Record which snippets each page used, and delete from the render cache
+        the snippets that no page uses anymore.
+
+        Pages that did not use snippets in this build, for example because an
+        incremental build skipped them, keep the snippets of the previous one
+        """
+        site_paths = {page.site_path for page in self.site.iter_pages(static=False)}
+        snippets = {
+            site_path: keys
+            for site_path, keys in self.previous_snippet_keys.items()
+            if site_path in site_paths
+        }
+        for site_path, used in self.snippet_keys.items():
+            snippets[site_path] = sorted(used)
+
+        live = {key for keys in snippets.values() for key in keys}
+        stale = {
+            key for keys in self.previous_snippet_keys.values() for key in keys
+        } - live
+        if stale:
+            self.render_cache.delete_many(sorted(stale))
+
+        return {"snippets": snippets}
+
+    def set_previous_footprint(self, footprint: dict[str, Any]) -> None:
+        snippets = footprint.get("snippets")
+        self.previous_snippet_keys = snippets if isinstance(snippets, dict) else {}
+
+    def create_renderer(self) -> BaseMarkdownRenderer:
+        return self.renderer_cls(self.site.settings, self.site.highlight_cache)
 
     def get_used_page_types(self) -> list[type[Page]]:
         return [MarkdownPage]
@@ -134,16 +283,43 @@ class MarkdownPages(MarkupFeature, Feature):
     def jinja2_markdown(self, context: jinja2.runtime.Context, mdtext: str) -> str:
         return markupsafe.Markup(self.render_snippet(context.parent["page"], mdtext))
 
-    def render_snippet(self, page: Page, content: str) -> str:
+    def render_snippet(self, page: Page, content: str, absolute: bool = False) -> str:
         """
-        Render markdown in the context of the given page.
+        Render a markdown string in the context of the given page.
 
-        It renders the page content by default, unless `content` is set to a
-        different markdown string.
+        Results are reused for the same string rendered with the same link
+        resolution context, and are kept in the render cache across builds
+        as long as the links in them resolve to the same pages.
         """
-        self.link_resolver.set_page(page, absolute=False)
-        self.markdown.reset()
-        return self.markdown.convert(content)
+        cache_key = "snippet:" + digest(
+            [content, page.search_root_node.path, page.site_url, absolute]
+        )
+        self.snippet_keys.setdefault(page.site_path, set()).add(cache_key)
+        if (rendered := self.rendered_snippets.pop(cache_key, None)) is not None:
+            self.rendered_snippets[cache_key] = rendered
+            return rendered
+
+        with self.renderer() as renderer:
+            renderer.link_resolver.set_page(page, absolute=absolute)
+            cached = self.render_cache.get(cache_key)
+            if cached is not None and renderer.link_resolver.load_cache(
+                cached["paths"]
+            ):
+                rendered = cast(str, cached["rendered"])
+            else:
+                rendered = cast(BaseMarkdownRenderer, renderer).convert(content)
+                self.render_cache.put(
+                    cache_key,
+                    {
+                        "rendered": rendered,
+                        "paths": renderer.link_resolver.to_cache(),
+                    },
+                )
+
+        self.rendered_snippets[cache_key] = rendered
+        if len(self.rendered_snippets) > self.max_rendered_snippets:
+            del self.rendered_snippets[next(iter(self.rendered_snippets))]
+        return rendered
 
     def load_dir(
         self,
@@ -159,7 +335,12 @@ class MarkdownPages(MarkupFeature, Feature):
             taken.append(fname)
 
             try:
-                fm_meta, body = self.load_file_meta(directory, fname)
+                if (
+                    preparsed := self.site.preparsed.get((self.name, src.abspath))
+                ) is not None:
+                    fm_meta, body = preparsed
+                else:
+                    fm_meta, body = self.load_file_meta(directory, fname)
             except Exception as e:
                 log.warning(
                     "%s: Failed to parse markdown page front matter (%s): skipped",
@@ -194,6 +375,13 @@ class MarkdownPages(MarkupFeature, Feature):
 
         return pages
 
+    def get_preparse_job(
+        self, fname: str, src: file.File
+    ) -> Callable[[str], Any] | None:
+        if not fname.endswith(".md"):
+            return None
+        return parse_file
+
     def load_dir_meta(self, directory: fstree.Tree) -> dict[str, Any] | None:
         # Load front matter from index.md
         # Do not try to load front matter from README.md, as one wouldn't
@@ -231,24 +419,7 @@ class MarkdownPages(MarkupFeature, Feature):
 
         Returns the metadata and the markdown lines for the rest of the file
         """
-        fmt, meta, body = front_matter.read_markdown_partial(fd)
-
-        body = list(body)
-
-        # Remove leading empty lines
-        while body and not body[0]:
-            body.pop(0)
-
-        # Read title from first # title if not specified in metadata
-        if not meta.get("title", ""):
-            if body and body[0].startswith("# "):
-                meta["title"] = body.pop(0)[2:].strip()
-
-            # Remove leading empty lines again
-            while body and not body[0]:
-                body.pop(0)
-
-        return meta, body
+        return read_file_meta(fd)
 
     def try_load_archetype(
         self, archetypes: Archetypes, relpath: str, name: str
@@ -385,6 +556,18 @@ class MarkdownPage(TemplatePage, MarkupPage, FrontMatterPage):
 
     Markdown rendering makes use of these settings:
 
+    ### `MARKDOWN_BACKEND`
+
+    Markdown engine used to render pages. Defaults to `"python-markdown"`.
+
+    Set it to `"markdown-it"` to render pages with the faster
+    [markdown-it-py](https://markdown-it-py.readthedocs.io/), which needs
+    `markdown-it-py` and `mdit-py-plugins` to be installed. It implements
+    [CommonMark](https://commonmark.org/) with tables, strikethrough,
+    footnotes and definition lists. Links, page folds and code highlighting
+    work as with python-markdown, and `MARKDOWN_EXTENSIONS` and
+    `MARKDOWN_EXTENSION_CONFIGS` are ignored.
+
     ### `MARKDOWN_EXTENSIONS`
 
     Extensions used by python-markdown. Defaults to:
@@ -426,6 +609,9 @@ class MarkdownPage(TemplatePage, MarkupPage, FrontMatterPage):
     # Match a Markdown divider line
     re_divider = re.compile(r"^____+$")
 
+    # Paragraph used to find the fold in the rendered page body
+    FOLD_MARKER = "staticsitefold3c7b6f1e"
+
     def __init__(self, *, body: list[str], **kw: Any):
         self.feature: MarkdownPages
         # Indexed by default
@@ -442,6 +628,11 @@ class MarkdownPage(TemplatePage, MarkupPage, FrontMatterPage):
         # External links found when rendering the page
         self.rendered_external_links: set[str] = set()
 
+        # Rendered body fragments for the last link mode used, as a tuple of
+        # the absolute flag and the fragments. They are dropped once the page
+        # itself has been rendered: the render cache keeps them across builds
+        self.rendered_fragments: tuple[bool, dict[str, str]] | None = None
+
         # Split lead and rest of the post, if a divider line is present
         for idx, line in enumerate(body):
             if self.re_divider.match(line):
@@ -465,62 +656,124 @@ class MarkdownPage(TemplatePage, MarkupPage, FrontMatterPage):
     def check(self) -> None:
         self.render()
 
-    def _render_page(
-        self, body: list[str], render_type: str, absolute: bool = False
-    ) -> str:
+    def render(self, **kw: Any) -> RenderedElement:
+        try:
+            return super().render(**kw)
+        finally:
+            self.rendered_fragments = None
+
+    def _render_fragments(self, absolute: bool = False) -> dict[str, str]:
         """
-        Render markdown in the context of the given page.
+        Render the page body once, split into the parts used to compose the
+        various ways the page is shown:
+
+        * ``start``: the body up to the fold, or the whole body if there is
+          no fold
+        * ``rest``: the body from the fold onwards, including footnotes, or
+          empty if there is no fold
+        * ``footnotes``: the footnotes at the end of ``rest``
+        * ``inline_footnotes``: the footnotes referenced in ``start``
+        * ``continue_url``: URL to the page for "continue reading" links, or
+          empty if there is no fold
+
+        Rendering the body as a single document keeps footnotes and
+        reference links working across the fold.
         """
-        cache_key = f"{render_type}:{self.src.relpath}"
-
-        with self.markup_render_context(cache_key, absolute=absolute) as context:
-            if rendered := context.cache.get("rendered"):
-                # log.info("%s: markdown cache hit", page.src.relpath)
-                return cast(str, rendered)
-
-            self.feature.markdown.reset()
-            rendered = self.feature.markdown.convert("\n".join(body))
-
-            self.rendered_external_links.update(
-                self.feature.link_resolver.external_links
-            )
+        if (memo := self.rendered_fragments) is not None and memo[0] == absolute:
+            return memo[1]
 
-            context.cache["rendered"] = rendered
+        cache_key = f"{'a' if absolute else 'r'}:{self.src.relpath}"
 
-        return rendered
+        with self.markup_render_context(cache_key, absolute=absolute) as context:
+            # Entries without inline_footnotes are from an older version
+            if (
+                fragments := context.cache.get("fragments")
+            ) and "inline_footnotes" in fragments:
+                self.rendered_external_links.update(
+                    context.link_resolver.external_links
+                )
+                self.rendered_fragments = (absolute, fragments)
+                return cast(dict[str, str], fragments)
+
+            renderer = cast(BaseMarkdownRenderer, context.renderer)
+            start: str
+            rest = footnotes = inline_footnotes = continue_url = ""
+            if self.body_rest is None:
+                start = renderer.convert("\n".join(self.body_start))
+            else:
+                rendered = renderer.convert(
+                    "\n".join(
+                        self.body_start + ["", self.FOLD_MARKER, ""] + self.body_rest
+                    )
+                )
+                start, sep, rest = rendered.partition(f"<p>{self.FOLD_MARKER}</p>")
+                if sep:
+                    start = start.removesuffix("\n")
+                    rest = rest.removeprefix("\n")
+                    if (pos := rest.rfind(renderer.FOOTNOTES_START)) != -1:
+                        footnotes = rest[pos:]
+                        inline_footnotes = select_footnotes(footnotes, start)
+                else:
+                    # The marker got mangled, for example by an unterminated
+                    # code block: show the whole page, as rendering the two
+                    # parts separately would give clashing footnote ids
+                    log.warning("%s: cannot find the fold in the rendered page", self)
+                    start = rendered.replace(self.FOLD_MARKER, "")
+                    rest = ""
+
+                continue_url = context.link_resolver.resolve_url(f"/{self.src.relpath}")
+
+            self.rendered_external_links.update(context.link_resolver.external_links)
+
+            fragments = {
+                "start": start,
+                "rest": rest,
+                "footnotes": footnotes,
+                "inline_footnotes": inline_footnotes,
+                "continue_url": continue_url,
+            }
+            context.cache["fragments"] = fragments
+
+        self.rendered_fragments = (absolute, fragments)
+        return fragments
+
+    @staticmethod
+    def _compose(*parts: str) -> str:
+        """
+        Join HTML blocks the way python-markdown does
+        """
+        return "\n".join(part for part in parts if part)
 
     @jinja2.pass_context
     def html_body(self, context: jinja2.runtime.Context, **kw: Any) -> str:
         absolute = self != context["page"]
+        fragments = self._render_fragments(absolute=absolute)
         if self.body_rest is not None:
-            body = self.body_start + ["", "<a name='sep'></a>", ""] + self.body_rest
-            return self._render_page(body, render_type="hb", absolute=absolute)
-        else:
-            return self._render_page(
-                self.body_start, render_type="s", absolute=absolute
+            return self._compose(
+                fragments["start"], "<p><a name='sep'></a></p>", fragments["rest"]
             )
+        else:
+            return fragments["start"]
 
     @jinja2.pass_context
     def html_inline(self, context: jinja2.runtime.Context, **kw: Any) -> str:
         absolute = self != context["page"]
+        fragments = self._render_fragments(absolute=absolute)
         if self.body_rest is not None:
-            body = self.body_start + ["", f"[(continue reading)](/{self.src.relpath})"]
-            return self._render_page(body, render_type="h", absolute=absolute)
-        else:
-            return self._render_page(
-                self.body_start, render_type="s", absolute=absolute
+            url = markupsafe.escape(fragments["continue_url"])
+            return self._compose(
+                fragments["start"],
+                f'<p><a href="{url}">(continue reading)</a></p>',
+                fragments["inline_footnotes"],
             )
+        else:
+            return fragments["start"]
 
     @jinja2.pass_context
     def html_feed(self, context: jinja2.runtime.Context, **kw: Any) -> str:
         absolute = self != context["page"]
-        if self.body_rest is not None:
-            body = self.body_start + [""] + self.body_rest
-            return self._render_page(body, render_type="f", absolute=absolute)
-        else:
-            return self._render_page(
-                self.body_start, render_type="f", absolute=absolute
-            )
+        fragments = self._render_fragments(absolute=absolute)
+        return self._compose(fragments["start"], fragments["rest"])
 
 
 FEATURES = {
@@ -1,24 +1,28 @@
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
 import io
 import logging
 import os
+from collections.abc import Callable, Collection
 from typing import IO, TYPE_CHECKING, Any, cast
 
-import docutils.core
-import docutils.io
-import docutils.nodes
-import docutils.writers.html5_polyglot
 import jinja2
 
 from staticsite.archetypes import Archetype
+from staticsite.cache import DisabledCache
 from staticsite.feature import Feature
+from staticsite.footprints import digest
 from staticsite.markup import MarkupFeature, MarkupPage
 from staticsite.page import FrontMatterPage, Page, TemplatePage
 from staticsite.utils import yaml_codec
 
 if TYPE_CHECKING:
+    import docutils.frontend
     import docutils.node
+    import docutils.nodes
 
     from staticsite import file, fstree
     from staticsite.archetypes import Archetypes
@@ -40,12 +44,19 @@ class DoctreeScan:
         self.links_target: list[docutils.nodes.target | docutils.nodes.reference] = []
         # All <image> link elements that need rewriting on rendering
         self.links_image: list[docutils.nodes.image] = []
-        # Return True if the link targets have been rewritten
-        self.links_rewritten = False
 
         # Scan tree contents looking for significant nodes
         self.scan(self.doctree)
 
+        # Link targets as written in the source, since rendering rewrites
+        # them differently depending on the link mode
+        self.links_target_uris: list[str | None] = [
+            node.attributes.get("refuri") for node in self.links_target
+        ]
+        self.links_image_uris: list[str | None] = [
+            node.attributes.get("uri") for node in self.links_image
+        ]
+
     def remove_docinfo(self) -> None:
         # Remove docinfo element from tree
         if self.docinfo is not None:
@@ -55,6 +66,8 @@ class DoctreeScan:
         """
         Scan the doctree collecting significant elements
         """
+        import docutils.nodes
+
         for idx, node in enumerate(element.children):
             if self.first_title is None and isinstance(node, docutils.nodes.title):
                 self.first_title = node
@@ -72,6 +85,189 @@ class DoctreeScan:
             self.scan(node)
 
 
+def _load_default_settings(*components: Any) -> docutils.frontend.Values:
+    """
+    Build docutils settings for the given components.
+
+    Like docutils' publish_* functions, this also reads the docutils
+    configuration files, like ``docutils.conf``, ``~/.docutils`` or the ones
+    listed in ``$DOCUTILSCONFIG``
+    """
+    import warnings
+
+    import docutils.frontend
+
+    # docutils deprecates OptionParser, but it is still the only way to read
+    # configuration files outside of a Publisher
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        option_parser = docutils.frontend.OptionParser(
+            components, read_config_files=True
+        )
+        return option_parser.get_default_values()
+
+
+@functools.cache
+def _default_parser_settings() -> docutils.frontend.Values:
+    """
+    Build the default docutils settings used to parse documents.
+
+    Building them is a fixed cost that is paid only once per process
+    """
+    import docutils.parsers.rst
+    import docutils.readers.standalone
+    import docutils.writers.null
+
+    return _load_default_settings(
+        docutils.parsers.rst.Parser,
+        docutils.readers.standalone.Reader,
+        docutils.writers.null.Writer,
+    )
+
+
+@functools.cache
+def _default_writer_settings() -> docutils.frontend.Values:
+    """
+    Build the default docutils settings used to render doctrees to HTML
+    """
+    import docutils.parsers.null
+    import docutils.readers.doctree
+    import docutils.writers.html5_polyglot
+
+    settings = _load_default_settings(
+        docutils.parsers.null.Parser,
+        docutils.readers.doctree.Reader,
+        docutils.writers.html5_polyglot.Writer,
+    )
+    # Only the body is used: do not read stylesheets at each rendering
+    settings.embed_stylesheet = False
+    settings.stylesheet_path = []
+    return settings
+
+
+def parser_settings() -> docutils.frontend.Values:
+    """
+    Return docutils settings to parse a document.
+
+    Docutils stores per-document state in the settings, so each document
+    gets its own copy of the defaults
+    """
+    return _copy_settings(_default_parser_settings())
+
+
+def writer_settings() -> docutils.frontend.Values:
+    """
+    Return docutils settings to render a doctree to HTML
+    """
+    return _copy_settings(_default_writer_settings())
+
+
+def _copy_settings(defaults: docutils.frontend.Values) -> docutils.frontend.Values:
+    """
+    Copy docutils settings, giving the copy its own dependency list
+    """
+    import docutils.utils
+
+    settings = copy.copy(defaults)
+    settings.record_dependencies = docutils.utils.DependencyList()
+    return settings
+
+
+def parse_rest(
+    fd: IO[str], yaml_tags: Collection[str], remove_docinfo: bool = True
+) -> tuple[dict[str, Any], DoctreeScan]:
+    """
+    Parse a rest document.
+
+    Return a tuple of 2 elements:
+        * a dict with the first docinfo entries
+        * the doctree with the docinfo removed
+
+    The contents of docinfo entries named in ``yaml_tags`` are parsed as yaml.
+    """
+    meta, doctree_scan = parse_doctree(fd, remove_docinfo=remove_docinfo)
+    return parse_yaml_tags(meta, yaml_tags), doctree_scan
+
+
+def parse_doctree(
+    fd: IO[str], remove_docinfo: bool = True
+) -> tuple[dict[str, str], DoctreeScan]:
+    """
+    Parse a rest document.
+
+    Return a tuple of 2 elements:
+        * a dict with the text of the first docinfo entries
+        * the doctree with the docinfo removed
+    """
+    # docutils is imported only when the first reStructuredText file is found
+    import docutils.core
+    import docutils.io
+
+    # Parse input into doctree
+    doctree = docutils.core.publish_doctree(
+        fd, source_class=docutils.io.FileInput, settings=parser_settings()
+    )
+
+    doctree_scan = DoctreeScan(doctree)
+
+    # Get metadata fields from docinfo
+    meta = {}
+    if doctree_scan.docinfo is not None:
+        for child in doctree_scan.docinfo.children:
+            if child.tagname == "field":
+                name = child.attributes.get("classes")[0]
+                for fchild in child.children:
+                    if fchild.tagname == "field_body":
+                        meta[name] = fchild.astext().strip()
+            else:
+                meta[child.tagname] = child.astext().strip()
+
+    if doctree_scan.first_title is not None:
+        if "title" not in meta:
+            meta["title"] = doctree_scan.first_title.astext()
+        # If the title element is at the beginning of the doctree, remove
+        # it to avoid a duplicate title in the rendered content
+        if (
+            doctree_scan.docinfo
+            and doctree_scan.docinfo.children
+            and doctree_scan.docinfo.children[0] == doctree_scan.first_title
+        ):
+            doctree_scan.doctree.children.pop(0)
+
+    if remove_docinfo:
+        doctree_scan.remove_docinfo()
+
+    return meta, doctree_scan
+
+
+def parse_yaml_tags(meta: dict[str, str], yaml_tags: Collection[str]) -> dict[str, Any]:
+    """
+    Return a copy of meta with the contents of the entries named in
+    ``yaml_tags`` parsed as yaml
+    """
+    res: dict[str, Any] = dict(meta)
+    for tag in yaml_tags:
+        val = res.get(tag)
+        if val is not None and isinstance(val, str):
+            res[tag] = yaml_codec.loads(val)
+    return res
+
+
+def parse_file(abspath: str) -> tuple[dict[str, str], DoctreeScan]:
+    """
+    Parse a rest document given its absolute path.
+
+    This is used to parse files in worker processes: the parts of the doctree
+    that cannot be sent back to the main process are dropped, and docutils
+    recreates them when rendering.
+    """
+    with open(abspath) as fd:
+        meta, doctree_scan = parse_doctree(fd)
+    doctree_scan.doctree.reporter = None
+    doctree_scan.doctree.transformer = None
+    return meta, doctree_scan
+
+
 class RestructuredText(MarkupFeature, Feature):
     """
     Render ``.rst`` reStructuredText pages, with front matter.
@@ -84,6 +280,20 @@ class RestructuredText(MarkupFeature, Feature):
 
         self.render_cache = self.site.caches.get("rst")
 
+        # Docinfo entries of documents from previous builds, keyed by source
+        # relpath. Doctrees are not cached: documents are parsed again only
+        # if their rendering is not in the render cache
+        self.meta_cache = self.site.caches.get("rst_meta")
+        self.cache_meta = not isinstance(self.meta_cache, DisabledCache)
+        # Newly parsed documents to add to the docinfo cache
+        self.cache_updates: list[tuple[str, dict[str, Any]]] = []
+
+        # index.rst documents parsed while scanning directories, by abspath
+        self.parsed: dict[str, tuple[dict[str, str], DoctreeScan | None]] = {}
+
+        # Digests of source files, by abspath
+        self.source_digests: dict[str, str] = {}
+
         # Names of tags whose content should be parsed as yaml
         self.yaml_tags = {"files", "dirs"}
         self.yaml_tags_filled = False
@@ -101,59 +311,118 @@ class RestructuredText(MarkupFeature, Feature):
             * a dict with the first docinfo entries
             * the doctree with the docinfo removed
         """
-        # Parse input into doctree
-        doctree = docutils.core.publish_doctree(fd, source_class=docutils.io.FileInput)
-
-        doctree_scan = DoctreeScan(doctree)
-
-        # Get metadata fields from docinfo
-        meta = {}
-        if doctree_scan.docinfo is not None:
-            for child in doctree_scan.docinfo.children:
-                if child.tagname == "field":
-                    name = child.attributes.get("classes")[0]
-                    for fchild in child.children:
-                        if fchild.tagname == "field_body":
-                            meta[name] = fchild.astext().strip()
-                else:
-                    meta[child.tagname] = child.astext().strip()
-
-        if doctree_scan.first_title is not None:
-            if "title" not in meta:
-                meta["title"] = doctree_scan.first_title.astext()
-            # If the title element is at the beginning of the doctree, remove
-            # it to avoid a duplicate title in the rendered content
-            if (
-                doctree_scan.docinfo
-                and doctree_scan.docinfo.children
-                and doctree_scan.docinfo.children[0] == doctree_scan.first_title
+        with self.site.highlight_cache.use_docutils():
+            return parse_rest(
+                fd, yaml_tags=self.yaml_tags, remove_docinfo=remove_docinfo
+            )
+
+    def _fill_yaml_tags(self) -> None:
+        """
+        Add the names of structured page fields to the tags parsed as yaml
+        """
+        if self.yaml_tags_filled:
+            return
+        cls = self.site.features.get_page_class(RstPage)
+        for name, field in cls._fields.items():
+            if field.structure:
+                self.yaml_tags.add(name)
+        self.yaml_tags_filled = True
+
+    def source_digest(self, src: file.File) -> str:
+        """
+        Return a digest of the contents of a source file
+        """
+        import docutils
+
+        if (res := self.source_digests.get(src.abspath)) is None:
+            with open(src.abspath, "rb") as fd:
+                contents = hashlib.blake2b(fd.read(), digest_size=16).hexdigest()
+            res = digest([contents, docutils.__version__])
+            self.source_digests[src.abspath] = res
+        return res
+
+    def is_cached(self, src: file.File) -> bool:
+        """
+        Check if the docinfo cache has an up to date version of src
+        """
+        return self.load_cached(src) is not None
+
+    def load_cached(self, src: file.File) -> dict[str, str] | None:
+        """
+        Return the docinfo entries of src from the docinfo cache, if src has
+        not changed since they were cached
+        """
+        cached = self.meta_cache.get(src.relpath)
+        if not isinstance(cached, dict):
+            return None
+        if cached.get("digest") != self.source_digest(src):
+            return None
+        meta = cached.get("meta")
+        if not isinstance(meta, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in meta.items()
+        ):
+            log.debug("%s: cached docinfo has an unexpected format", src.relpath)
+            return None
+        return meta
+
+    def parse_source(self, src: file.File) -> tuple[dict[str, str], DoctreeScan]:
+        """
+        Parse the docinfo entries and doctree of a source file
+        """
+        with (
+            open(src.abspath) as fd,
+            self.site.highlight_cache.use_docutils(),
+        ):
+            return parse_doctree(fd)
+
+    def load_doctree(
+        self, directory: fstree.Tree, fname: str, src: file.File
+    ) -> tuple[dict[str, str], DoctreeScan | None]:
+        """
+        Return the docinfo entries and doctree of a source file, reusing the
+        results of preparsing or of a previous build when possible.
+
+        If the docinfo entries come from a previous build, the doctree is None,
+        and the document is parsed again only if it needs rendering.
+        """
+        if (meta := self.load_cached(src)) is not None:
+            return meta, None
+
+        if (parsed := self.site.preparsed.get((self.name, src.abspath))) is None:
+            with (
+                directory.open(fname, "rt") as fd,
+                self.site.highlight_cache.use_docutils(),
             ):
-                doctree_scan.doctree.children.pop(0)
+                parsed = parse_doctree(fd)
 
-        # If requested, parse some tag contents as yaml
-        if self.yaml_tags:
-            for tag in self.yaml_tags:
-                val = meta.get(tag)
-                if val is not None and isinstance(val, str):
-                    meta[tag] = yaml_codec.loads(val)
+        if self.cache_meta:
+            self.cache_updates.append(
+                (src.relpath, {"digest": self.source_digest(src), "meta": parsed[0]})
+            )
 
-        if remove_docinfo:
-            doctree_scan.remove_docinfo()
+        return parsed
 
-        return meta, doctree_scan
+    def get_preparse_job(
+        self, fname: str, src: file.File
+    ) -> Callable[[str], Any] | None:
+        if not fname.endswith(".rst"):
+            return None
+        if src.abspath in self.parsed or self.is_cached(src):
+            return None
+        return parse_file
 
     def load_dir_meta(self, directory: fstree.Tree) -> dict[str, Any] | None:
         # Load front matter from index.rst
         # Do not try to load front matter from README.md, as one wouldn't
         # clutter a repo README with staticsite front matter
-        if "index.rst" not in directory.files:
+        if (src := directory.files.get("index.rst")) is None:
             return None
 
-        # Parse to get at the front matter
-        with directory.open("index.rst", "rt") as fd:
-            meta, doctree_scan = self.parse_rest(fd, remove_docinfo=False)
+        # Keep the parsed document for load_dir
+        parsed = self.load_doctree(directory, "index.rst", src)
+        self.parsed[src.abspath] = parsed
 
-        return meta
+        return parse_yaml_tags(parsed[0], self.yaml_tags)
 
     def load_dir(
         self,
@@ -161,12 +430,7 @@ class RestructuredText(MarkupFeature, Feature):
         directory: fstree.Tree,
         files: dict[str, tuple[dict[str, Any], file.File]],
     ) -> list[Page]:
-        if not self.yaml_tags_filled:
-            cls = self.site.features.get_page_class(RstPage)
-            for name, field in cls._fields.items():
-                if field.structure:
-                    self.yaml_tags.add(name)
-            self.yaml_tags_filled = True
+        self._fill_yaml_tags()
 
         taken: list[str] = []
         pages: list[Page] = []
@@ -176,7 +440,10 @@ class RestructuredText(MarkupFeature, Feature):
             taken.append(fname)
 
             try:
-                fm_meta, doctree_scan = self.load_file_meta(directory, fname)
+                if (parsed := self.parsed.pop(src.abspath, None)) is None:
+                    parsed = self.load_doctree(directory, fname, src)
+                fm_meta = parse_yaml_tags(parsed[0], self.yaml_tags)
+                doctree_scan = parsed[1]
             except Exception as e:
                 log.debug(
                     "%s: Failed to parse RestructuredText page: skipped",
@@ -205,16 +472,11 @@ class RestructuredText(MarkupFeature, Feature):
         for fname in taken:
             del files[fname]
 
-        return pages
-
-    def load_file_meta(
-        self, directory: fstree.Tree, fname: str
-    ) -> tuple[dict[str, Any], DoctreeScan]:
-        # Parse document into a doctree and extract docinfo metadata
-        with directory.open(fname, "rt") as fd:
-            meta, doctree_scan = self.parse_rest(fd)
+        if self.cache_updates:
+            self.meta_cache.put_many(self.cache_updates)
+            self.cache_updates = []
 
-        return meta, doctree_scan
+        return pages
 
     def try_load_archetype(
         self, archetypes: Archetypes, relpath: str, name: str
@@ -337,13 +599,13 @@ class RstPage(FrontMatterPage, MarkupPage, TemplatePage):
 
     TYPE = "rst"
 
-    def __init__(self, *, doctree_scan: DoctreeScan, **kw: Any):
+    def __init__(self, *, doctree_scan: DoctreeScan | None, **kw: Any):
         self.feature: RestructuredText
         # Indexed by default
         kw.setdefault("indexed", True)
         super().__init__(**kw)
 
-        # Document doctree root node
+        # Document doctree, or None if it has not been parsed in this build
         self.doctree_scan = doctree_scan
 
     def front_matter_changed(self, fd: IO[str]) -> bool:
@@ -357,28 +619,35 @@ class RstPage(FrontMatterPage, MarkupPage, TemplatePage):
         self._render_page()
 
     def _render_page(self, absolute: bool = False) -> str:
-        cache_key = self.src.relpath
+        import docutils.core
+        import docutils.io
+        import docutils.writers.html5_polyglot
+
+        # Renderings are cached separately for each link mode
+        cache_key = f"{'abs' if absolute else 'rel'}:{self.src.relpath}"
         with self.markup_render_context(cache_key, absolute=absolute) as context:
             if cached := context.cache.get("rendered"):
                 # log.info("%s: rst cache hit", page.src.relpath)
                 return cast(str, cached)
 
-            if not self.doctree_scan.links_rewritten:
-                for node in self.doctree_scan.links_target:
-                    node.attributes["refuri"] = context.link_resolver.resolve_url(
-                        node.attributes["refuri"]
-                    )
-                for node in self.doctree_scan.links_image:
-                    node.attributes["uri"] = context.link_resolver.resolve_url(
-                        node.attributes["uri"]
-                    )
-                self.doctree_scan.links_rewritten = True
+            if self.doctree_scan is None:
+                self.doctree_scan = self.feature.parse_source(self.src)[1]
+
+            doctree_scan = self.doctree_scan
+            for node, uri in zip(
+                doctree_scan.links_target, doctree_scan.links_target_uris
+            ):
+                if uri is not None:
+                    node.attributes["refuri"] = context.link_resolver.resolve_url(uri)
+            for node, uri in zip(
+                doctree_scan.links_image, doctree_scan.links_image_uris
+            ):
+                if uri is not None:
+                    node.attributes["uri"] = context.link_resolver.resolve_url(uri)
 
             writer = docutils.writers.html5_polyglot.Writer()
-            # TODO: study if/how we can con configure publish_programmatically to
-            # do as little work as possible
             output, pub = docutils.core.publish_programmatically(
-                source=self.doctree_scan.doctree,
+                source=doctree_scan.doctree,
                 source_path=None,
                 source_class=docutils.io.DocTreeInput,
                 destination=None,
@@ -390,7 +659,7 @@ class RstPage(FrontMatterPage, MarkupPage, TemplatePage):
                 parser_name="null",
                 writer=writer,
                 writer_name=None,
-                settings=None,
+                settings=writer_settings(),
                 settings_spec=None,
                 settings_overrides=None,
                 config_section=None,
@@ -333,9 +333,9 @@ class SyndicationDateField(fields.Date[Page]):
     """
 
     def __get__(self, page: Page, type: type[Page] | None = None) -> datetime.datetime:
-        if (date := page.__dict__.get(self.name)) is None:
+        if (date := self._get_value(page)) is None:
             date = page.date
-            page.__dict__[self.name] = date
+            self._set_value(page, date)
         return cast(datetime.datetime, date)
 
 
@@ -347,9 +347,9 @@ class SyndicatedField(fields.Bool[Page]):
     """
 
     def __get__(self, page: Page, type: type[Page] | None = None) -> bool:
-        if (cur := page.__dict__.get(self.name)) is None:
+        if (cur := self._get_value(page)) is None:
             value = cast(bool, page.indexed)
-            page.__dict__[self.name] = value
+            self._set_value(page, value)
             return value
         else:
             return cast(bool, cur)
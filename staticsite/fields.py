@@ -16,6 +16,12 @@ log = logging.getLogger("fields")
 P = TypeVar("P", bound="FieldContainer")
 V = TypeVar("V")
 
+# Marker for field values that have not been set
+UNSET: Any = object()
+
+# Inherited values table of objects without a parent
+_EMPTY_TABLE: dict[str, Any] = {}
+
 
 class Field(Generic[P, V]):
     """
@@ -56,22 +62,45 @@ class Field(Generic[P, V]):
     def __set_name__(self, owner: type[P], name: str) -> None:
         self.name = name
 
+    def _get_value(self, obj: P, default: Any = None) -> Any:
+        """
+        Return the value stored for this field, or default if it has not been
+        set
+        """
+        if (value := obj._field_values[obj._field_slots[self.name]]) is UNSET:
+            return default
+        return value
+
+    def _set_value(self, obj: P, value: Any) -> None:
+        """
+        Store a value for this field, bypassing validation
+        """
+        obj._field_values[obj._field_slots[self.name]] = value
+        if self.inherited and obj._inherited is not None:
+            # Drop the table computed for children, and make them check theirs
+            obj._inherited = None
+            obj.site.inherited_generation += 1
+
+    def _is_set(self, obj: P) -> bool:
+        """
+        Check if a value has been stored for this field
+        """
+        return obj._field_values[obj._field_slots[self.name]] is not UNSET
+
     def __get__(self, obj: P, type: type[P] | None = None) -> V | None:
-        if self.inherited:
-            if self.name not in obj.__dict__:
-                if obj._parent is not None and self.name in obj._parent._fields:
-                    value = getattr(obj._parent, self.name)
-                else:
-                    value = self.default
-                obj.__dict__[self.name] = value
-                return cast(V, value)
-            else:
-                return cast(V, obj.__dict__[self.name])
-        else:
-            return obj.__dict__.get(self.name, self.default)
+        values = obj._field_values
+        slot = obj._field_slots[self.name]
+        if (value := values[slot]) is not UNSET:
+            return cast(V, value)
+        if self.inherited and (parent := obj._parent) is not None:
+            # Look up the value in the parent's table, without copying it
+            return cast(
+                V, parent.get_inherited_values().get(self.name, self.default)
+            )
+        return self.default
 
     def __set__(self, obj: P, value: Any) -> None:
-        obj.__dict__[self.name] = self._clean(obj, value)
+        self._set_value(obj, self._clean(obj, value))
 
     def _clean(self, obj: P, value: Any) -> V:
         """
@@ -88,14 +117,14 @@ class Const(Field[P, V]):
     """
 
     def __get__(self, obj: P, type: type[P] | None = None) -> V:
-        if self.name not in obj.__dict__:
+        if (value := self._get_value(obj, UNSET)) is UNSET:
             raise RuntimeError(f"{obj!r}.{self.name} has not been set")
-        return cast(V, obj.__dict__[self.name])
+        return cast(V, value)
 
     def __set__(self, obj: P, value: Any) -> None:
-        if self.name in obj.__dict__:
+        if self._is_set(obj):
             raise RuntimeError(f"{obj!r}.{self.name} has already been set")
-        obj.__dict__[self.name] = self._clean(obj, value)
+        self._set_value(obj, self._clean(obj, value))
 
 
 class ConstTypeField(Const[P, V]):
@@ -127,7 +156,7 @@ class Template(Field[P, jinja2.Template]):
         if isinstance(value, jinja2.Template):
             return value
         elif isinstance(value, str):
-            return obj.site.theme.jinja2.from_string(value)
+            return obj.site.theme.from_string(value)
         else:
             raise ValueError(f"{value!r} is not a valid value for a template field")
 
@@ -201,10 +230,10 @@ class Dict(Field[P, dict[str, Any]]):
     """
 
     def __get__(self, obj: P, type: type[P] | None = None) -> dict[str, Any]:
-        if (value := obj.__dict__.get(self.name)) is None:
+        if (value := self._get_value(obj)) is None:
             value = {}
-            obj.__dict__[self.name] = value
-        return value
+            self._set_value(obj, value)
+        return cast(dict[str, Any], value)
 
     def _clean(self, obj: P, value: Any) -> dict[str, Any]:
         """
@@ -218,10 +247,17 @@ class Dict(Field[P, dict[str, Any]]):
 class FieldsMetaclass(type):
     """
     Allow a class to have a set of Field members, defining self-documenting
-    metadata elements
+    metadata elements.
+
+    Field values are stored in a per-instance list, indexed by a slot number
+    assigned to each field of the class. This is more compact than storing
+    them in the instance ``__dict__``, which would be resized as fields are set
+    or inherited in different orders by different pages.
     """
 
     _fields: dict[str, Field[Any, Any]]
+    _field_slots: dict[str, int]
+    _inherited_field_slots: tuple[tuple[str, int], ...]
 
     def __new__(
         cls: type[FieldsMetaclass], name: str, bases: tuple[type], dct: dict[str, Any]
@@ -244,13 +280,27 @@ class FieldsMetaclass(type):
 
         res = super().__new__(cls, name, bases, dct)
         res._fields = _fields
+        res._field_slots = {name: idx for idx, name in enumerate(_fields)}
+        res._inherited_field_slots = tuple(
+            (name, idx) for idx, (name, f) in enumerate(_fields.items()) if f.inherited
+        )
         return res
 
 
 class FieldContainer(metaclass=FieldsMetaclass):
     _fields: dict[str, Field[Any, Any]]
+    _field_slots: dict[str, int]
+    _inherited_field_slots: tuple[tuple[str, int], ...]
+
+    # Values of inherited fields as seen by children of this object, the
+    # parent table they were computed from, and the site generation at which
+    # they were last known to be valid. It is set on the instance the first
+    # time children look it up, so objects without children do not store it
+    _inherited: tuple[dict[str, Any], dict[str, Any], int] | None = None
 
     def __init__(self, site: Site, *, parent: FieldContainer | None = None, **kw: Any):
+        # Storage for field values, indexed by _field_slots
+        self._field_values: list[Any] = [UNSET] * len(self._field_slots)
         # Reference to Site, so that fields can access configuration, template
         # compilers, and so on
         self.site = site
@@ -259,6 +309,46 @@ class FieldContainer(metaclass=FieldsMetaclass):
 
         self.update_fields(kw)
 
+    def get_inherited_values(self) -> dict[str, Any]:
+        """
+        Return the values of inherited fields that children of this object
+        will see.
+
+        The table is shared with the parent when this object does not set any
+        inherited field itself, so it must not be modified.
+        """
+        inherited = self._inherited
+        generation = self.site.inherited_generation
+        # Fast path: no inherited field changed in the site since the table
+        # was last validated
+        if inherited is not None and inherited[2] == generation:
+            return inherited[0]
+
+        if self._parent is not None:
+            parent_table = self._parent.get_inherited_values()
+        else:
+            parent_table = _EMPTY_TABLE
+
+        # Only rebuild the table if this object or one of its ancestors
+        # changed
+        if inherited is not None and inherited[1] is parent_table:
+            table = inherited[0]
+        else:
+            # Copy on write: only create a new table if we override some values
+            own = [
+                (name, value)
+                for name, slot in self._inherited_field_slots
+                if (value := self._field_values[slot]) is not UNSET
+            ]
+            if own:
+                table = dict(parent_table)
+                table.update(own)
+            else:
+                table = parent_table
+
+        self._inherited = (table, parent_table, generation)
+        return table
+
     def update_fields(self, values: dict[str, Any]) -> None:
         for name, value in values.items():
             if name in self._fields:
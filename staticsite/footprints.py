@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .cache import Cache
+
+# Key prefix for the footprint of a source page, followed by its relpath
+KEY_PAGE = "footprint:"
+# Key prefix for the list of source pages in a directory, followed by the
+# directory relpath
+KEY_DIR = "footprint_dir:"
+# Key for the list of directories with footprints
+KEY_DIRS = "footprint_dirs"
+
+
+def digest(data: Any) -> str:
+    """
+    Compute a stable digest of a JSON-serializable structure
+    """
+    encoded = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class Footprints:
+    """
+    Footprints of source pages from a previous build, stored in the build
+    cache to allow incremental builds.
+
+    Each footprint is stored as a separate record, and is only read when a
+    page needs it. The names of the source pages in each directory are also
+    stored, to detect pages that have been deleted.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+        # Names of source pages in each directory in the previous build,
+        # loaded on demand
+        self.listings: dict[str, frozenset[str]] = {}
+
+    def listing(self, dirname: str) -> frozenset[str]:
+        """
+        Return the names of the source pages found in a directory in the
+        previous build
+        """
+        if (res := self.listings.get(dirname)) is None:
+            names = self.cache.get(KEY_DIR + dirname)
+            res = frozenset(names) if names else frozenset()
+            self.listings[dirname] = res
+        return res
+
+    def get(self, relpath: str) -> dict[str, Any] | None:
+        """
+        Return the footprint of a source page in the previous build, or None if
+        the page did not exist
+        """
+        dirname, name = os.path.split(relpath)
+        if name not in self.listing(dirname):
+            return None
+        return self.cache.get(KEY_PAGE + relpath)
+
+    def deleted(self, dirname: str, names: Iterable[str]) -> set[str]:
+        """
+        Return the names of the source pages that existed in the given
+        directory in the previous build, and are not in names
+        """
+        return set(self.listing(dirname).difference(names))
+
+    def save(self, footprints: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        """
+        Store the footprints of all the source pages in the current build,
+        given as (relpath, footprint) pairs
+        """
+        listings: dict[str, list[str]] = defaultdict(list)
+
+        def records() -> Iterable[tuple[str, Any]]:
+            for relpath, footprint in footprints:
+                dirname, name = os.path.split(relpath)
+                listings[dirname].append(name)
+                yield KEY_PAGE + relpath, footprint
+
+        self.cache.put_many(records())
+
+        # Forget the footprints of pages that are gone, and the listings of
+        # directories that no longer have pages
+        old_dirs = self.cache.get(KEY_DIRS) or ()
+        removed: list[str] = []
+        for dirname in set(old_dirs).union(listings.keys()):
+            old_names = self.cache.get(KEY_DIR + dirname) or ()
+            names = set(listings.get(dirname, ()))
+            removed.extend(
+                KEY_PAGE + os.path.join(dirname, name)
+                for name in old_names
+                if name not in names
+            )
+            if not names:
+                removed.append(KEY_DIR + dirname)
+        self.cache.delete_many(removed)
+
+        updates: list[tuple[str, Any]] = [
+            (KEY_DIR + dirname, sorted(names)) for dirname, names in listings.items()
+        ]
+        updates.append((KEY_DIRS, sorted(listings.keys())))
+        self.cache.put_many(updates)
+        self.listings = {}
+
+    def clear(self) -> None:
+        """
+        Forget all footprints from the previous build
+        """
+        self.save(())
@@ -12,6 +12,7 @@ from .file import File
 from .utils import front_matter, open_dir_fd
 
 if TYPE_CHECKING:
+    from .preparse import PreparseJob
     from .site import Site
     from .source_node import SourceNode, SourcePageNode
 
@@ -250,16 +251,43 @@ class PageTree(Tree):
             node.update_fields(meta)
             self.sub[name] = tree
 
+    def _file_meta(self, fname: str) -> dict[str, Any]:
+        """
+        Compute metadata for a file from the file matching rules
+        """
+        res: dict[str, Any] = {}
+        for pattern, meta in self.file_rules:
+            if pattern.match(fname):
+                res.update(meta)
+        return res
+
+    def collect_preparse_jobs(self, jobs: list[PreparseJob]) -> None:
+        """
+        Recursively collect jobs for parsing files in worker processes
+        """
+        from .preparse import PreparseJob
+
+        features = self.site.features.ordered()
+        for fname, src in self.files.items():
+            # Assets are not parsed
+            if self._file_meta(fname).get("asset"):
+                continue
+            for feature in features:
+                if (parse := feature.get_preparse_job(fname, src)) is not None:
+                    jobs.append(PreparseJob(feature.name, src.abspath, parse))
+                    break
+
+        for tree in self.sub.values():
+            if isinstance(tree, PageTree):
+                tree.collect_preparse_jobs(jobs)
+
     def populate_node(self) -> None:
         # Add the metadata scanned for this directory
 
         # Compute metadata for files
         files_meta: dict[str, tuple[dict[str, Any], File]] = {}
         for fname, src in self.files.items():
-            res: dict[str, Any] = {}
-            for pattern, meta in self.file_rules:
-                if pattern.match(fname):
-                    res.update(meta)
+            res = self._file_meta(fname)
 
             # Handle assets right away
             if res.get("asset"):
@@ -63,6 +63,10 @@ EDITOR: str = os.environ.get("EDITOR", "sensible-editor")
 # for expansion, and {name} is the absolute path of the file to edit.
 EDIT_COMMAND: Sequence[str] = ["{EDITOR}", "{name}", "+"]
 
+# Markdown engine used to render markdown pages: "python-markdown", or
+# "markdown-it" to use the faster markdown-it-py CommonMark implementation
+MARKDOWN_BACKEND: str = "python-markdown"
+
 # extensions for python-markdown and their config used for this site
 MARKDOWN_EXTENSIONS = [
     "markdown.extensions.extra",
@@ -87,6 +91,11 @@ DRAFT_MODE: bool = False
 # If True, store cached data to speed up rebuilds
 CACHE_REBUILDS: bool = True
 
+# Number of worker processes used to parse source files while loading the
+# site. Default if None: the number of CPUs. Set to 0 or 1 to parse everything
+# in the main process
+LOAD_WORKERS: int | None = None
+
 # Patterns (glob or regexps) that identify files in content directories that
 # are parsed as jinja2 templates
 JINJA2_PAGES: Sequence[str] = ["*.html", "*.j2.*"]
@@ -95,6 +104,12 @@ JINJA2_PAGES: Sequence[str] = ["*.html", "*.j2.*"]
 # If you trust your site sources, it renders noticeably faster.
 JINJA2_SANDBOXED = True
 
+# If True, keep fragments rendered with {% cache %} across builds
+JINJA2_PERSIST_FRAGMENTS: bool = False
+
+# If True, measure the time spent rendering each template and block
+JINJA2_PROFILE: bool = False
+
 # Languages used to build the site
 # For now, only the first one is used, and only its locale is used.
 LANGUAGES: Sequence[dict[str, Any]] = [
@@ -4,7 +4,7 @@ import contextlib
 import logging
 from collections.abc import Generator
 from typing import TYPE_CHECKING, Any, NamedTuple
-from urllib.parse import urlparse, urlunparse
+from urllib.parse import urlparse
 
 from .page import PageNotFoundError, SourcePage
 
@@ -36,12 +36,15 @@ class LinkResolver:
         self.absolute: bool = False
         self.substituted: dict[str, ResolvedLink] = {}
         self.external_links: set[str] = set()
+        # Results of resolve_url for the current page
+        self.resolved_urls: dict[str, str] = {}
 
     def set_page(self, page: Page, absolute: bool = False) -> None:
         self.page = page
         self.absolute = absolute
         self.substituted = {}
         self.external_links = set()
+        self.resolved_urls = {}
 
     def load_cache(self, paths: list[tuple[str, str]]) -> bool:
         # If the destination of links has changed, drop the cached version.
@@ -99,28 +102,64 @@ class LinkResolver:
             raise RuntimeError(
                 "LinkResolver.resolve_page called before LinkResolver.set_page"
             )
+        if (res := self.resolved_urls.get(url)) is not None:
+            return res
+
         if (resolved := self.resolve_page(url)) is None:
-            return url
-
-        new_url = self.page.url_for(resolved.page, absolute=self.absolute)
-        dest = urlparse(new_url)
-
-        return urlunparse(
-            (
-                dest.scheme,
-                dest.netloc,
-                dest.path,
-                resolved.url.params,
-                resolved.url.query,
-                resolved.url.fragment,
-            )
-        )
+            res = url
+        else:
+            # url_for returns a URL with only scheme, netloc and path: add
+            # the rest of the original URL as urlunparse would
+            res = self.page.url_for(resolved.page, absolute=self.absolute)
+            if resolved.url.params:
+                res += ";" + resolved.url.params
+            if resolved.url.query:
+                res += "?" + resolved.url.query
+            if resolved.url.fragment:
+                res += "#" + resolved.url.fragment
+
+        self.resolved_urls[url] = res
+        return res
+
+
+class MarkupRenderer:
+    """
+    State used to render the markup of one page at a time
+    """
+
+    def __init__(self) -> None:
+        self.link_resolver = LinkResolver()
 
 
 class MarkupFeature:
     def __init__(self, *args: Any, **kw: Any):
         super().__init__(*args, **kw)
-        self.link_resolver = LinkResolver()
+        # Renderers that are not currently in use
+        self.renderers: list[MarkupRenderer] = []
+
+    def create_renderer(self) -> MarkupRenderer:
+        """
+        Create a new renderer for this markup
+        """
+        return MarkupRenderer()
+
+    @contextlib.contextmanager
+    def renderer(self) -> Generator[MarkupRenderer, None, None]:
+        """
+        Check out a renderer for exclusive use while rendering a page.
+
+        Renderers are reused across pages, and new ones are created when
+        rendering is nested or concurrent
+        """
+        # list.pop and list.append are atomic, so this is safe with threads
+        try:
+            renderer = self.renderers.pop()
+        except IndexError:
+            renderer = self.create_renderer()
+        try:
+            yield renderer
+        finally:
+            self.renderers.append(renderer)
 
 
 class MarkupRenderContext:
@@ -128,9 +167,10 @@ class MarkupRenderContext:
     State held during rendering of a page markup
     """
 
-    def __init__(self, page: MarkupPage, cache_key: str):
+    def __init__(self, page: MarkupPage, cache_key: str, renderer: MarkupRenderer):
         self.page = page
-        self.link_resolver = page.feature.link_resolver
+        self.renderer = renderer
+        self.link_resolver = renderer.link_resolver
         self.cache_key = cache_key
         self.cache: dict[str, Any]
 
@@ -150,6 +190,12 @@ class MarkupRenderContext:
             self.reset_cache()
             return
 
+        if (external_links := cache.get("external_links")) is None:
+            # Cached by a version that did not store external links
+            self.reset_cache()
+            return
+        self.link_resolver.external_links.update(external_links)
+
         self.cache = cache
 
     def reset_cache(self) -> None:
@@ -159,6 +205,7 @@ class MarkupRenderContext:
 
     def save(self) -> None:
         self.cache["paths"] = self.link_resolver.to_cache()
+        self.cache["external_links"] = sorted(self.link_resolver.external_links)
         self.page.feature.render_cache.put(self.cache_key, self.cache)
 
 
@@ -177,8 +224,9 @@ class MarkupPage(SourcePage):
     def markup_render_context(
         self, cache_key: str, absolute: bool = False
     ) -> Generator[MarkupRenderContext, None, None]:
-        self.feature.link_resolver.set_page(self, absolute)
-        render_context = MarkupRenderContext(self, cache_key)
-        render_context.load()
-        yield render_context
-        render_context.save()
+        with self.feature.renderer() as renderer:
+            renderer.link_resolver.set_page(self, absolute)
+            render_context = MarkupRenderContext(self, cache_key, renderer)
+            render_context.load()
+            yield render_context
+            render_context.save()
@@ -125,6 +125,14 @@ class Node(SiteElement):
             yield from node.iter_pages(prune, source_only=source_only)
 
     def lookup_page(self, path: Path) -> Page | None:
+        if (index := self.site.path_index) is not None:
+            return index.lookup(self, path)
+        return self._lookup_page(path)
+
+    def _lookup_page(self, path: Path) -> Page | None:
+        """
+        Find a page walking the node structure
+        """
         # print(f"Node.lookup_page: {self.name=!r}, {self.page=!r}, {path=!r},"
         #       f" sub={self.sub.keys() if self.sub else 'None'}")
 
@@ -134,29 +142,35 @@ class Node(SiteElement):
         if path.head == "..":
             if self.parent is None:
                 return None
-            return self.parent.lookup_page(path.tail)
+            return self.parent._lookup_page(path.tail)
         elif path.head in (".", ""):
             # Probably not worth trying to avoid a recursion step here, since
             # this should not be a common occurrence
-            return self.lookup_page(path.tail)
+            return self._lookup_page(path.tail)
 
         if len(path) > 1:
             if not self.sub:
                 return None
             elif subnode := self.sub.get(path.head):
                 # print(f"Node.lookup_page:  descend into {subnode.name!r} with {path.tail=!r}")
-                return subnode.lookup_page(path.tail)
+                return subnode._lookup_page(path.tail)
             else:
                 return None
 
+        return self._lookup_name(path.head)
+
+    def _lookup_name(self, name: str) -> Page | None:
+        """
+        Find a page by the last component of a path
+        """
         # Match subnode name
-        if (subnode := self.sub.get(path.head)) and subnode.page:
+        if (subnode := self.sub.get(name)) and subnode.page:
             return subnode.page
 
         # Match subpage names and basename of src.relpath in subpages
-        if (page := self.build_pages.get(path.head)) is not None:
+        if (page := self.build_pages.get(name)) is not None:
             return page
-        if (page := self.by_src_relpath.get(path.head)) is not None:
+        if (page := self.by_src_relpath.get(name)) is not None:
             return page
 
         return None
@@ -359,3 +373,66 @@ class Node(SiteElement):
                 return True
             node = node.parent
         return False
+
+
+class PathIndex:
+    """
+    Index of site pages by path, and of their URLs, used to resolve page
+    lookups and links once the site structure is stable.
+    """
+
+    def __init__(self, site: Site):
+        # Pages by path components from the site root
+        self.pages: dict[tuple[str, ...], Page] = {}
+        # Path components of each node from the site root
+        self.node_paths: dict[Node, tuple[str, ...]] = {}
+        # Lookup results by (node, target)
+        self.resolved: dict[tuple[Node, str], Page | None] = {}
+        # Relative and absolute URLs of pages
+        self.urls: dict[Page, tuple[str, str | None]] = {}
+
+        if site.root.page is not None:
+            self.pages[()] = site.root.page
+        self._add_node(site.root, ())
+
+    def _add_node(self, node: Node, path: tuple[str, ...]) -> None:
+        self.node_paths[node] = path
+        names = node.sub.keys() | node.build_pages.keys() | node.by_src_relpath.keys()
+        for name in names:
+            if (page := node._lookup_name(name)) is not None:
+                self.pages[path + (name,)] = page
+        for name, sub in node.sub.items():
+            self._add_node(sub, path + (name,))
+
+    def lookup(self, node: Node, path: Path) -> Page | None:
+        """
+        Find a page by path, relative to the given node
+        """
+        parts = tuple(name for name in path if name not in (".", ""))
+        if not parts:
+            return node.page
+        if ".." in parts or (base := self.node_paths.get(node)) is None:
+            # Walk the tree to find out how .. interacts with missing nodes
+            return node._lookup_page(path)
+        return self.pages.get(base + parts)
+
+    def resolve(self, node: Node, target: str) -> Page | None:
+        """
+        Find a page by a path string, relative to the given node
+        """
+        key = (node, target)
+        try:
+            return self.resolved[key]
+        except KeyError:
+            pass
+        page = self.lookup(node, Path.from_string(target))
+        self.resolved[key] = page
+        return page
+
+    def page_urls(self, page: Page) -> tuple[str, str | None]:
+        """
+        Return the relative and absolute URLs of a page
+        """
+        if (res := self.urls.get(page)) is None:
+            res = self.urls[page] = page.compute_urls()
+        return res
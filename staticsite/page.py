@@ -13,6 +13,7 @@ import jinja2
 import markupsafe
 
 from . import fields
+from .footprints import digest
 from .render import RenderedString
 from .site import Path, SiteElement
 from .utils.arrange import arrange
@@ -104,6 +105,8 @@ class Pages(collections.abc.Sequence["Page"]):
      - page filter
     """
 
+    __slots__ = ("page", "pages", "query", "arranged")
+
     def __init__(self, page: Page, value: Any):
         # Reference page for resolving relative paths
         self.page = page
@@ -114,6 +117,9 @@ class Pages(collections.abc.Sequence["Page"]):
         # Filter expression to enumerate pages
         self.query: dict[str, Any] | None = None
 
+        # Pages sorted by each sort expression used with arrange()
+        self.arranged: dict[str, list[Page]] | None = None
+
         if isinstance(value, str):
             self.query = {"path": value}
         elif isinstance(value, list):
@@ -209,7 +215,13 @@ class Pages(collections.abc.Sequence["Page"]):
             raise RuntimeError(
                 f"{self.page}.arrange is accessed before the crossreference step has run"
             )
-        return arrange(self.pages, sort=sort, limit=limit)
+        # The list does not change after crossreference: sort it once for each
+        # sort expression, and reuse the result
+        if self.arranged is None:
+            self.arranged = {}
+        if (res := self.arranged.get(sort)) is None:
+            res = self.arranged[sort] = arrange(self.pages, sort=sort)
+        return res[:limit]
 
 
 class PagesField(CrossreferenceField["Page", Pages]):
@@ -275,11 +287,11 @@ class TemplateField(fields.Field["TemplatePage", Union[str, jinja2.Template]]):
     def __get__(
         self, page: TemplatePage, type: type[TemplatePage] | None = None
     ) -> str | jinja2.Template:
-        if self.name not in page.__dict__:
-            page.__dict__[self.name] = page.TEMPLATE
+        if not self._is_set(page):
+            self._set_value(page, page.TEMPLATE)
             return page.TEMPLATE
         else:
-            return cast(str, page.__dict__[self.name])
+            return cast(str, self._get_value(page))
 
     def _clean(self, obj: Page, value: Any) -> str | jinja2.Template:
         if isinstance(value, str):
@@ -299,13 +311,13 @@ class PageDate(fields.Date["Page"]):
     """
 
     def __get__(self, page: Page, type: type[Page] | None = None) -> datetime.datetime:
-        if (date := page.__dict__.get(self.name)) is None:
+        if (date := self._get_value(page)) is None:
             if (src := getattr(page, "src", None)) is not None and src.stat is not None:
                 date = page.site.localized_timestamp(src.stat.st_mtime)
             else:
                 date = page.site.generation_time
-            page.__dict__[self.name] = date
-        return date
+            self._set_value(page, date)
+        return cast(datetime.datetime, date)
 
 
 class Draft(fields.Bool["SourcePage"]):
@@ -314,9 +326,9 @@ class Draft(fields.Bool["SourcePage"]):
     """
 
     def __get__(self, page: SourcePage, type: type[SourcePage] | None = None) -> Any:
-        if (value := page.__dict__.get(self.name)) is None:
+        if (value := self._get_value(page)) is None:
             value = page.date > page.site.generation_time
-            page.__dict__[self.name] = value
+            self._set_value(page, value)
             return value
         else:
             return value
@@ -324,45 +336,51 @@ class Draft(fields.Bool["SourcePage"]):
 
 class RenderedField(fields.Str["Page"]):
     """
-    Field whose value is rendered from other fields
+    Field whose value is rendered from other fields.
+
+    Once the site has been cross-referenced, the rendered value is stored in
+    the page, so that the template is rendered only once per page.
     """
 
+    def _render(self, page: Page) -> str | None:
+        """
+        Compute the value of the field
+        """
+        if tpl := getattr(page, "template_" + self.name, None):
+            # If a template exists, render it
+            page.site.rendered_fields[self.name] += 1
+            return markupsafe.Markup(tpl.render(page=page))
+        return self.default
+
     def __get__(self, page: Page, type: type[Page] | None = None) -> str | None:
-        if (cur := page.__dict__.get(self.name)) is None:
-            value: str
-            if tpl := getattr(page, "template_" + self.name, None):
-                # If a template exists, render it
-                value = markupsafe.Markup(tpl.render(page=page))
-                self.__dict__[self.name] = value
-                return value
-            elif self.default is not None:
-                self.__dict__[self.name] = self.default
-                return self.default
-            else:
-                return None
-        else:
+        if (cur := self._get_value(page)) is not None:
             return cast(str, cur)
+        value = self._render(page)
+        # Templates can refer to any part of the site, which is only stable
+        # after cross-referencing
+        if (
+            value is not None
+            and page.site.last_load_step >= page.site.LOAD_STEP_CROSSREFERENCE
+        ):
+            self._set_value(page, value)
+        return value
 
 
-class RenderedTitleField(fields.Str["Page"]):
+class RenderedTitleField(RenderedField):
     """
     Render the tile for a page, defaulting to site_name if missing
     """
 
-    def __get__(self, page: Page, type: type[Page] | None = None) -> str:
-        if (cur := page.__dict__.get(self.name)) is None:
-            value: str
-            if tpl := getattr(page, "template_" + self.name, None):
-                # If a template exists, render it
-                value = markupsafe.Markup(tpl.render(page=page))
-            elif page.site_name is None:
-                raise RuntimeError("site_name not set")
-            else:
-                value = page.site_name
-            self.__dict__[self.name] = value
+    def _render(self, page: Page) -> str:
+        if (value := super()._render(page)) is not None:
             return value
+        elif page.site_name is None:
+            raise RuntimeError("site_name not set")
         else:
-            return cast(str, cur)
+            return page.site_name
+
+    def __get__(self, page: Page, type: type[Page] | None = None) -> str:
+        return cast(str, super().__get__(page, type))
 
 
 class Related(collections.abc.MutableMapping[str, "Page"]):
@@ -370,6 +388,8 @@ class Related(collections.abc.MutableMapping[str, "Page"]):
     Container for related pages
     """
 
+    __slots__ = ("page", "pages")
+
     def __init__(self, page: Page):
         self.page = page
         self.pages: dict[str, str | Page] = {}
@@ -471,10 +491,10 @@ class RelatedField(fields.Field["Page", Related]):
     """
 
     def __get__(self, page: Page, type: type[Page] | None = None) -> Related:
-        if (value := page.__dict__.get(self.name)) is None:
+        if (value := self._get_value(page)) is None:
             value = Related(page)
-            page.__dict__[self.name] = value
-        return value
+            self._set_value(page, value)
+        return cast(Related, value)
 
     def __set__(self, page: Page, value: Related) -> None:
         related = self.__get__(page)
@@ -486,6 +506,8 @@ class Meta:
     Read-only dict accessor to Page's fields
     """
 
+    __slots__ = ("_page",)
+
     def __init__(self, page: Page):
         self._page = page
 
@@ -625,8 +647,6 @@ class Page(SiteElement):
 
         super().__init__(site, **kw)
 
-        # Read-only, dict-like accessor to the page's fields
-        self.meta: Meta = Meta(self)
         # Node to use as initial node for find_pages
         self.search_root_node: Node = search_root_node
         # Set to True if this page is a directory index. This affects the root
@@ -640,6 +660,15 @@ class Page(SiteElement):
         if self.site_url is None:
             raise PageMissesFieldError(self, "site_url")
 
+    @property
+    def meta(self) -> Meta:
+        """
+        Read-only, dict-like accessor to the page's fields
+        """
+        # Meta is a lightweight wrapper, created on access to avoid storing
+        # one in each page
+        return Meta(self)
+
     @property
     def site_path(self) -> str:
         """
@@ -663,11 +692,16 @@ class Page(SiteElement):
         limit: int | None = None,
         sort: str | None = None,
         **kw: Any,
-    ) -> list[Page]:
+    ) -> Sequence[Page]:
         """
         If not set, default root to the path of the containing directory for
         this page
         """
+        if (index := self.site.page_index) is not None:
+            return index.query(
+                self.search_root_node, path=path, limit=limit, sort=sort, **kw
+            )
+
         from .page_filter import PageFilter
 
         f = PageFilter(
@@ -702,22 +736,32 @@ class Page(SiteElement):
 
         # print(f"Page.url_for {self=!r}, {target=!r}, {page=!r}")
 
+        if (index := self.site.path_index) is not None:
+            url, absolute_url = index.page_urls(page)
+        else:
+            url, absolute_url = page.compute_urls()
+
         # If the destination has a different site_url, generate an absolute url
-        if self.site_url != page.site_url:
-            absolute = True
+        if absolute or self.site_url != page.site_url:
+            if absolute_url is None:
+                raise RuntimeError("site_url is None")
+            return absolute_url
+        else:
+            return url
 
+    def compute_urls(self) -> tuple[str, str | None]:
+        """
+        Return the URL of this page relative to the site root, and its
+        absolute URL, or None if the page has no site_url
+        """
         if self.site.root.site_path:
-            path = os.path.join(self.site.root.site_path, page.site_path).strip("/")
+            path = os.path.join(self.site.root.site_path, self.site_path).strip("/")
         else:
-            path = page.site_path.strip("/")
+            path = self.site_path.strip("/")
 
-        if absolute:
-            if page.site_url is None:
-                raise RuntimeError("site_url is None")
-            site_url = page.site_url.rstrip("/")
-            return f"{site_url}/{path}"
-        else:
-            return "/" + path
+        if self.site_url is None:
+            return "/" + path, None
+        return "/" + path, f"{self.site_url.rstrip('/')}/{path}"
 
     def crossreference(self) -> None:
         """
@@ -796,7 +840,6 @@ It defaults to false, or true if `meta.date` is in the future.
         *,
         node: Node,
         src: File,
-        old_footprint: dict[str, Any] | None = None,
         **kw: Any,
     ):
         # Information about the source file for this page
@@ -805,8 +848,12 @@ It defaults to false, or true if `meta.date` is in the future.
         super().__init__(site, parent=node, node=node, **kw)
         self.source_name: str = os.path.basename(self.src.relpath)
 
-        # Cached footprint from the previous run, or None
-        self.old_footprint: dict[str, Any] | None = old_footprint
+    @cached_property
+    def old_footprint(self) -> dict[str, Any] | None:
+        """
+        Footprint from the previous build, or None
+        """
+        return self.site.footprints.get(self.src.relpath)
 
     def __str__(self) -> str:
         return self.site_path
@@ -915,7 +962,8 @@ class FrontMatterPage(SourcePage):
                 fm[k] = v.strftime("%Y-%m-%d %H:%M:%S %Z")
             else:
                 fm[k] = v
-        res["fm"] = fm
+        # Only a digest is needed to detect front matter changes
+        res["fm"] = digest(fm)
         return res
 
     def _compute_change_extent(self) -> ChangeExtent:
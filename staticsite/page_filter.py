@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+import bisect
+import datetime
 import fnmatch
 import os
 import re
-from collections.abc import Callable, Generator, Sequence
+from collections.abc import Callable, Generator, Iterable, Sequence
 from typing import TYPE_CHECKING, Any, cast
 
 from . import site
 from .page import Page
+from .utils.dates import parse_date
 
 if TYPE_CHECKING:
     from .node import Node
 
 
+# Characters with special meaning in a glob expression
+re_glob_special = re.compile(r"[*?[]")
+
+
 def compile_page_match(pattern: str | re.Pattern[str]) -> re.Pattern[str]:
     """
     Return a compiled re.Pattern from a glob or regular expression.
@@ -31,6 +38,28 @@ def compile_page_match(pattern: str | re.Pattern[str]) -> re.Pattern[str]:
     return re.compile(fnmatch.translate(pattern))
 
 
+def compile_page_prefix(pattern: str | re.Pattern[str]) -> tuple[str, ...]:
+    """
+    Return the leading directory names that all paths matching a glob
+    expression must have.
+
+    This can be used to skip walking subtrees that cannot contain matching
+    pages. Regular expressions, and globs starting with a wildcard, return an
+    empty tuple.
+    """
+    if isinstance(pattern, re.Pattern):
+        return ()
+    if pattern and (pattern[0] == "^" or pattern[-1] == "$"):
+        return ()
+    res: list[str] = []
+    # The last component matches page names, and is never a prefix
+    for name in pattern.split("/")[:-1]:
+        if re_glob_special.search(name):
+            break
+        res.append(name)
+    return tuple(res)
+
+
 def sort_args(
     sort: str | None,
 ) -> tuple[str | None, bool, Callable[[Page], Any] | None]:
@@ -66,6 +95,294 @@ def sort_args(
         return sort, reverse, key
 
 
+def _query_key(kw: dict[str, Any]) -> frozenset[tuple[str, Any]]:
+    """
+    Normalize PageFilter arguments into a hashable key, so that equivalent
+    queries have the same key.
+
+    Raises TypeError if some arguments cannot be hashed
+    """
+    res: list[tuple[str, Any]] = []
+    for name, value in kw.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = frozenset(value)
+        elif isinstance(value, dict):
+            value = frozenset(value.items())
+        res.append((name, value))
+    return frozenset(res)
+
+
+# Sort keys for which PageIndex keeps presorted views
+INDEX_SORT_KEYS = frozenset(("date", "title", "syndication_date"))
+
+
+class PageIndex:
+    """
+    Index of the indexed pages in the site, used by PageFilter to select pages
+    without walking the node tree.
+
+    It is built after the crossreference stage, when the structure of the site
+    does not change anymore.
+    """
+
+    def __init__(self, site: site.Site):
+        self.site = site
+        # Indexed pages, in the order in which a walk of the node tree finds
+        # them. Pages are referred to by their position in this list
+        self.pages: list[Page] = []
+        # Node and build name of each page in self.pages
+        self.locations: list[tuple[Node, str]] = []
+        # Range of positions of the pages in the subtree of each node
+        self.subtrees: dict[Node, tuple[int, int]] = {}
+        # Positions of pages by taxonomy name and category name
+        self.categories: dict[str, dict[str, set[int]]] = {}
+        # Positions of pages sorted by a sort expression, for sort expressions
+        # based on INDEX_SORT_KEYS. Built on first use
+        self.sorted: dict[str, list[int]] = {}
+        # Positions of the pages in a node subtree, sorted by a sort
+        # expression. Built on first use from self.sorted
+        self.subtree_sorted: dict[tuple[Node, str], list[int]] = {}
+        # Dates of the pages in self.sorted["date"], used to select date
+        # ranges. Built on first use
+        self.dates: list[datetime.datetime] | None = None
+        # For each field name, positions of pages by field value, and
+        # positions of pages where the field is set. Built on first use, and
+        # None for fields with unhashable values
+        self.columns: dict[str, tuple[dict[Any, set[int]], set[int]] | None] = {}
+        # Results of page queries, by search root and normalized arguments
+        self.queries: dict[
+            tuple[Node, frozenset[tuple[str, Any]]], tuple[Page, ...]
+        ] = {}
+        # Number of page queries that were computed
+        self.query_misses = 0
+        # Number of page queries answered with a previous result
+        self.query_hits = 0
+
+        if (taxonomy_feature := self.site.features.get("taxonomy")) is not None:
+            from staticsite.features.taxonomy import TaxonomyFeature
+
+            for name in cast(TaxonomyFeature, taxonomy_feature).taxonomies:
+                self.categories[name] = {}
+
+        self._add_node(site.root)
+
+    def _add_node(self, node: Node) -> None:
+        start = len(self.pages)
+        for name, page in node.build_pages.items():
+            if not page.indexed:
+                continue
+            pos = len(self.pages)
+            self.pages.append(page)
+            self.locations.append((node, name))
+            for taxonomy, categories in self.categories.items():
+                for category in getattr(page, taxonomy, None) or ():
+                    categories.setdefault(category.name, set()).add(pos)
+        for sub in node.sub.values():
+            self._add_node(sub)
+        self.subtrees[node] = (start, len(self.pages))
+
+    def query(self, root: Node, **kw: Any) -> Sequence[Page]:
+        """
+        Return the pages selected by a PageFilter with the given arguments.
+
+        Results are memoized, and identical queries reuse the same result
+        """
+        key: tuple[Node, frozenset[tuple[str, Any]]] | None
+        try:
+            key = (root, _query_key(kw))
+            res = self.queries.get(key)
+        except TypeError:
+            key = res = None
+
+        if res is not None:
+            self.query_hits += 1
+            return res
+
+        self.query_misses += 1
+        res = tuple(PageFilter(self.site, root=root, **kw).filter())
+        if key is not None:
+            self.queries[key] = res
+        return res
+
+    def get_column(self, name: str) -> tuple[dict[Any, set[int]], set[int]] | None:
+        """
+        Return the positions of pages by value of the given field, and the
+        positions of the pages where the field is set.
+
+        Returns None if the field has values that cannot be indexed
+        """
+        if name in self.columns:
+            return self.columns[name]
+        res: tuple[dict[Any, set[int]], set[int]] | None
+        values: dict[Any, set[int]] = {}
+        present: set[int] = set()
+        try:
+            for pos, page in enumerate(self.pages):
+                if name not in page.meta:
+                    continue
+                present.add(pos)
+                values.setdefault(getattr(page, name), set()).add(pos)
+        except TypeError:
+            res = None
+        else:
+            res = (values, present)
+        self.columns[name] = res
+        return res
+
+    def select_dates(
+        self, after: datetime.datetime | None, before: datetime.datetime | None
+    ) -> set[int]:
+        """
+        Return the positions of the pages with a date in [after, before)
+        """
+        positions = self.get_sorted("date")
+        assert positions is not None
+        if self.dates is None:
+            self.dates = [self.pages[pos].date for pos in positions]
+        lo = 0 if after is None else bisect.bisect_left(self.dates, after)
+        hi = (
+            len(positions) if before is None else bisect.bisect_left(self.dates, before)
+        )
+        return set(positions[lo:hi])
+
+    def get_sorted(self, sort: str) -> list[int] | None:
+        """
+        Return the positions of the pages that have the sort field, in sort
+        order, or None if sort does not use one of INDEX_SORT_KEYS
+        """
+        if (res := self.sorted.get(sort)) is not None:
+            return res
+        sort_meta, sort_reverse, sort_key = sort_args(sort)
+        if sort_meta not in INDEX_SORT_KEYS or sort_key is None:
+            return None
+        res = sorted(
+            (pos for pos, page in enumerate(self.pages) if sort_meta in page.meta),
+            key=lambda pos: sort_key(self.pages[pos]),
+            reverse=sort_reverse,
+        )
+        self.sorted[sort] = res
+        return res
+
+    def get_subtree_sorted(self, root: Node, sort: str) -> list[int] | None:
+        """
+        Return the positions of the pages in the subtree of root that have the
+        sort field, in sort order, or None if sort does not use one of
+        INDEX_SORT_KEYS
+        """
+        if (res := self.subtree_sorted.get((root, sort))) is not None:
+            return res
+        if (positions := self.get_sorted(sort)) is None:
+            return None
+        start, end = self.subtrees[root]
+        if start == 0 and end == len(self.pages):
+            res = positions
+        else:
+            res = [pos for pos in positions if start <= pos < end]
+        self.subtree_sorted[(root, sort)] = res
+        return res
+
+    def select(self, f: PageFilter) -> list[Page] | None:
+        """
+        Return the pages selected by the filter, or None if the filter cannot
+        be answered using the index
+        """
+        if f.root not in self.subtrees:
+            return None
+
+        # Restrict the search to the subtree that can contain matching paths
+        prefix_node = f.root
+        for name in f.path_prefix:
+            if (sub := prefix_node.sub.get(name)) is None:
+                return []
+            prefix_node = sub
+        start, end = self.subtrees[prefix_node]
+
+        # Intersect the positions of the pages in all the required categories
+        selected: set[int] | None = None
+        for name, t_filter in f.taxonomy_filters:
+            categories = self.categories.get(name, {})
+            for category in t_filter:
+                if (positions := categories.get(category)) is None:
+                    return []
+                selected = positions if selected is None else selected & positions
+
+        # Intersect with the positions of pages matching field predicates
+        if f.date_after is not None or f.date_before is not None:
+            positions = self.select_dates(f.date_after, f.date_before)
+            selected = positions if selected is None else selected & positions
+        for name in f.has_fields:
+            if (column := self.get_column(name)) is not None:
+                positions = column[1]
+                selected = positions if selected is None else selected & positions
+        for name, value in f.fields.items():
+            if (column := self.get_column(name)) is not None:
+                try:
+                    positions = column[0].get(value, set())
+                except TypeError:
+                    continue
+                selected = positions if selected is None else selected & positions
+
+        allowed = set(f.allow) if f.allow is not None else None
+
+        # Prefix to remove from node paths to make them relative to f.root
+        prefix_len = len(f.root.path) + 1 if f.root.path else 0
+
+        order: Iterable[int]
+        presorted = False
+        if selected is not None:
+            order = sorted(selected)
+        elif (
+            f.sort is not None
+            and (positions := self.get_subtree_sorted(prefix_node, f.sort)) is not None
+        ):
+            presorted = True
+            order = positions
+        else:
+            order = range(start, end)
+
+        pages: list[Page] = []
+        for pos in order:
+            if pos < start or pos >= end:
+                continue
+            if selected is not None and pos not in selected:
+                continue
+            page = self.pages[pos]
+            if allowed is not None and page not in allowed:
+                continue
+            if not f.match_fields(page):
+                continue
+            if (
+                not presorted
+                and f.sort_meta is not None
+                and f.sort_meta not in page.meta
+            ):
+                continue
+            if f.re_path is not None:
+                node, name = self.locations[pos]
+                relpath = node.path[prefix_len:]
+                if f.re_path.match(os.path.join(relpath, name)):
+                    pass
+                elif page.source_name and f.re_path.match(
+                    os.path.join(relpath, page.source_name)
+                ):
+                    pass
+                else:
+                    continue
+            pages.append(page)
+            if presorted and f.limit is not None and len(pages) >= f.limit:
+                break
+
+        if not presorted and f.sort_key is not None:
+            pages.sort(key=f.sort_key, reverse=f.sort_reverse)
+
+        if f.limit is not None:
+            pages = pages[: f.limit]
+
+        return pages
+
+
 class PageFilter:
     """
     Engine for selecting pages in the site
@@ -80,17 +397,27 @@ class PageFilter:
         sort: str | None = None,
         root: Node | None = None,
         allow: Sequence[Page] | None = None,
+        date_after: str | datetime.datetime | None = None,
+        date_before: str | datetime.datetime | None = None,
+        data_type: str | None = None,
+        fields: dict[str, Any] | None = None,
+        has_fields: str | Sequence[str] | None = None,
         **kw: str,
     ):
         self.site = site
         self.root = root or site.root
 
         self.re_path: re.Pattern[str] | None
+        # Names of the directories that lead to all matching pages
+        self.path_prefix: tuple[str, ...]
         if path is not None:
             self.re_path = compile_page_match(path)
+            self.path_prefix = compile_page_prefix(path)
         else:
             self.re_path = None
+            self.path_prefix = ()
 
+        self.sort = sort
         self.sort_meta, self.sort_reverse, self.sort_key = sort_args(sort)
 
         self.taxonomy_filters: list[tuple[str, frozenset[str]]] = []
@@ -103,17 +430,61 @@ class PageFilter:
                     continue
                 self.taxonomy_filters.append((taxonomy.name, frozenset(t_filter)))
 
+        # Only select pages with a date in [date_after, date_before)
+        self.date_after = self._clean_date_bound("date_after", date_after)
+        self.date_before = self._clean_date_bound("date_before", date_before)
+
+        # Only select pages with these field values
+        self.fields: dict[str, Any] = dict(fields) if fields else {}
+        if data_type is not None:
+            self.fields["data_type"] = data_type
+
+        # Only select pages that have these fields set
+        self.has_fields: tuple[str, ...]
+        if has_fields is None:
+            self.has_fields = ()
+        elif isinstance(has_fields, str):
+            self.has_fields = (has_fields,)
+        else:
+            self.has_fields = tuple(has_fields)
+
         self.limit = limit
 
         self.allow = allow
 
         # print(f"PageFilter({path=!r}, {self.root.path=!r}, {self.re_path=!r}, {self.taxonomy_filters=}")
 
+    def _clean_date_bound(
+        self, name: str, value: str | datetime.datetime | None
+    ) -> datetime.datetime | None:
+        """
+        Turn a date filter argument into an aware datetime.
+
+        Unlike Site.clean_date, this raises ValueError on invalid dates instead
+        of using the current time, which would silently select the wrong pages
+        """
+        if value is None:
+            return None
+        if isinstance(value, str):
+            try:
+                value = parse_date(value)
+            except (ValueError, OverflowError) as e:
+                raise ValueError(f"{name}: invalid date {value!r}: {e}") from e
+        elif not isinstance(value, datetime.datetime):
+            raise ValueError(f"{name}: invalid date {value!r}")
+        return self.site.clean_date(value)
+
     def filter(self) -> list[Page]:
         # print("PageFilter.filter")
+        if (index := self.site.page_index) is not None:
+            if (selected := index.select(self)) is not None:
+                return selected
+
         pages = []
 
-        for page in self._filter(self.root or self.site.root, relpath=""):
+        for page in self._filter(
+            self.root or self.site.root, relpath="", prefix=self.path_prefix
+        ):
             pages.append(page)
 
         if self.sort_key is not None:
@@ -124,9 +495,33 @@ class PageFilter:
 
         return pages
 
-    def _filter(self, root: Node, relpath: str) -> Generator[Page, None, None]:
+    def match_fields(self, page: Page) -> bool:
+        """
+        Check if a page matches the date and field predicates of this filter
+        """
+        if self.date_after is not None or self.date_before is not None:
+            if (date := page.date) is None:
+                return False
+            if self.date_after is not None and date < self.date_after:
+                return False
+            if self.date_before is not None and date >= self.date_before:
+                return False
+        if self.has_fields or self.fields:
+            meta = page.meta
+            for name in self.has_fields:
+                if name not in meta:
+                    return False
+            for name, value in self.fields.items():
+                if name not in meta or getattr(page, name) != value:
+                    return False
+        return True
+
+    def _filter(
+        self, root: Node, relpath: str, prefix: tuple[str, ...]
+    ) -> Generator[Page, None, None]:
         """
         :arg:relpath: path of the page relative to the root node of the search
+        :arg:prefix: names of the subdirectories leading to pages that can match
         """
         for name, page in root.build_pages.items():
             # print(f"_filter {page=!r} indexed={page.meta['indexed']}")
@@ -139,13 +534,16 @@ class PageFilter:
 
             # Taxonomy_filters
             fail_taxonomies = False
-            for name, t_filter in self.taxonomy_filters:
-                page_tags = frozenset(t.name for t in getattr(page, name, ()))
+            for t_name, t_filter in self.taxonomy_filters:
+                page_tags = frozenset(t.name for t in getattr(page, t_name, ()))
                 if not t_filter.issubset(page_tags):
                     fail_taxonomies = True
             if fail_taxonomies:
                 continue
 
+            if not self.match_fields(page):
+                continue
+
             # print(f"_filter {page=!r} {relpath=!r} {page.dst}")
 
             if self.re_path is not None:
@@ -163,4 +561,8 @@ class PageFilter:
 
         if root.sub:
             for node in root.sub.values():
-                yield from self._filter(node, relpath=os.path.join(relpath, node.name))
+                if prefix and node.name != prefix[0]:
+                    continue
+                yield from self._filter(
+                    node, relpath=os.path.join(relpath, node.name), prefix=prefix[1:]
+                )
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from .site import Site
+
+log = logging.getLogger("preparse")
+
+# Below this number of files, the cost of starting worker processes is higher
+# than what we gain by parsing in parallel
+MIN_JOBS = 64
+
+
+class PreparseJob(NamedTuple):
+    """
+    Parsing of one source file that can be run in a worker process
+    """
+
+    # Name of the feature that will consume the result
+    feature: str
+    # Absolute path to the source file
+    abspath: str
+    # Picklable function that parses the file, given its absolute path.
+    # Its result also needs to be picklable.
+    parse: Callable[[str], Any]
+
+
+def _run_job(job: PreparseJob) -> tuple[bool, Any]:
+    """
+    Run a job in a worker process.
+
+    Errors are not reported here: the main process will parse the file again
+    and report them with the usual logging.
+    """
+    try:
+        return True, job.parse(job.abspath)
+    except Exception:
+        return False, None
+
+
+def get_worker_count(site: Site) -> int:
+    """
+    Return the number of worker processes to use for parsing
+    """
+    if (workers := site.settings.LOAD_WORKERS) is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def preparse(site: Site, jobs: list[PreparseJob]) -> dict[tuple[str, str], Any]:
+    """
+    Run the given jobs in a process pool.
+
+    Return a dict mapping (feature name, abspath) to the parsed results. Files
+    that failed to parse are not included in the result.
+    """
+    res: dict[tuple[str, str], Any] = {}
+
+    workers = get_worker_count(site)
+    if workers < 2 or len(jobs) < MIN_JOBS:
+        return res
+
+    log.debug("preparsing %d files using %d worker processes", len(jobs), workers)
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for job, (ok, parsed) in zip(
+            jobs, executor.map(_run_job, jobs, chunksize=chunksize)
+        ):
+            if ok:
+                res[(job.feature, job.abspath)] = parsed
+
+    return res
@@ -65,6 +65,9 @@ class Settings:
     # for expansion, and {name} is the absolute path of the file to edit.
     EDIT_COMMAND: Sequence[str]
 
+    # Markdown engine used to render markdown pages
+    MARKDOWN_BACKEND: str
+
     # extensions for python-markdown and their config used for this site
     MARKDOWN_EXTENSIONS: list[str]
     MARKDOWN_EXTENSION_CONFIGS: dict[str, Any]
@@ -78,6 +81,11 @@ class Settings:
     # If True, store cached data to speed up rebuilds
     CACHE_REBUILDS: bool
 
+    # Number of worker processes used to parse source files while loading the
+    # site. Default if None: the number of CPUs. Set to 0 or 1 to parse
+    # everything in the main process
+    LOAD_WORKERS: int | None
+
     # Patterns (glob or regexps) that identify files in content directories that
     # are parsed as jinja2 templates
     JINJA2_PAGES: Sequence[str]
@@ -86,6 +94,12 @@ class Settings:
     # If you trust your site sources, it renders noticeably faster.
     JINJA2_SANDBOXED: bool
 
+    # If True, keep fragments rendered with {% cache %} across builds
+    JINJA2_PERSIST_FRAGMENTS: bool
+
+    # If True, measure the time spent rendering each template and block
+    JINJA2_PROFILE: bool
+
     # Languages used to build the site
     # For now, only the first one is used, and only its locale is used.
     LANGUAGES: Sequence[dict[str, Any]]
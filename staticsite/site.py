@@ -5,23 +5,25 @@ import logging
 import os
 import re
 import zoneinfo
-from collections.abc import Generator, Iterable
+from collections import Counter
+from collections.abc import Generator
 from functools import cached_property
-from typing import TYPE_CHECKING, Any
-
-import dateutil.parser
-import pytz
+from typing import TYPE_CHECKING, Any, cast
 
 from . import fields, fstree
 from .cache import Caches, DisabledCaches
 from .file import File
+from .footprints import Footprints
 from .settings import Settings
 from .utils import timings
+from .utils.dates import parse_date
+from .utils.highlight import HighlightCache
 
 if TYPE_CHECKING:
     from .archetypes import Archetypes
-    from .node import Node
+    from .node import Node, PathIndex
     from .page import Page, SourcePage
+    from .page_filter import PageIndex
     from .source_node import RootNode, SourceNode
     from .theme import Theme
 
@@ -182,8 +184,6 @@ class SiteElement(fields.FieldContainer):
         if isinstance(target, Page):
             return target
 
-        path = Path.from_string(target)
-
         root: SiteElement
         if target.startswith("/"):
             if static:
@@ -193,7 +193,11 @@ class SiteElement(fields.FieldContainer):
         else:
             root = self
 
-        page = root.lookup_page(path)
+        if (index := self.site.path_index) is not None:
+            node = root.search_root_node if isinstance(root, Page) else root
+            page = index.resolve(cast("Node", node), target)
+        else:
+            page = root.lookup_page(Path.from_string(target))
 
         if page is None:
             raise PageNotFoundError(f"cannot resolve {target!r} relative to {root!r}")
@@ -251,9 +255,11 @@ class Site:
         if generation_time is not None:
             self.generation_time = generation_time.astimezone(self.timezone)
         else:
-            self.generation_time = pytz.utc.localize(
-                datetime.datetime.utcnow()
-            ).astimezone(self.timezone)
+            self.generation_time = datetime.datetime.now(self.timezone)
+
+        # Incremented when an inherited field changes after the inherited
+        # values of its object have been computed
+        self.inherited_generation = 0
 
         # Filesystem trees scanned by the site
         self.fstrees: dict[str, fstree.Tree] = {}
@@ -301,11 +307,29 @@ class Site:
         self.build_cache = self.caches.get("build")
 
         # Source page footprints from a previous build
-        self.previous_source_footprints: dict[str, dict[str, Any]]
+        self.footprints = Footprints(self.build_cache)
+
+        # Syntax highlighted code blocks, shared by markup features
+        self.highlight_cache = HighlightCache(self.caches.get("highlight"))
+
+        # Number of times each template_* field template has been rendered
+        self.rendered_fields: Counter[str] = Counter()
 
         # Pages for which we should call Page.crossreference() at the beginning of the crossreference stage
         self.pages_to_crossreference: set[Page] = set()
 
+        # Source files parsed in advance by worker processes, indexed by
+        # (feature name, abspath). Only filled while loading contents
+        self.preparsed: dict[tuple[str, str], Any] = {}
+
+        # Index used to answer page queries, built after the crossreference
+        # stage
+        self.page_index: PageIndex | None = None
+
+        # Index used to look up pages by path, built after the crossreference
+        # stage
+        self.path_index: PathIndex | None = None
+
     @cached_property
     def theme(self) -> Theme:
         """
@@ -322,7 +346,7 @@ class Site:
         This is used when something failed during a build, and the build
         directory is left in an inconsistent state
         """
-        self.build_cache.put("footprints", {})
+        self.footprints.clear()
 
     def save_footprints(self) -> None:
         """
@@ -331,22 +355,12 @@ class Site:
         This is used after a build completed successfully, to allow incremental
         future builds
         """
-        footprints = {
-            page.src.relpath: page.footprint for page in self._iter_source_pages()
-        }
-        self.build_cache.put("footprints", footprints)
+        self.footprints.save(
+            (page.src.relpath, page.footprint) for page in self._iter_source_pages()
+        )
         for feature in self.features.ordered():
             self.build_cache.put(f"footprint_{feature.name}", feature.get_footprint())
 
-    def deleted_source_pages(self) -> Iterable[str]:
-        """
-        Return a sequence with the source relpaths of pages deleted since the
-        last run
-        """
-        # Entries are popped from previous_source_footprints while pages are
-        # loaded, so if any remain it means that those pages have been deleted
-        return self.previous_source_footprints.keys()
-
     def iter_pages(
         self, static: bool = True, source_only: bool = False
     ) -> Generator[Page, None, None]:
@@ -388,12 +402,6 @@ class Site:
         Load default features
         """
         self.features.load_default_features()
-        # We can now load source files footprint, before theme loads assets
-        previous_source_footprints = self.build_cache.get("footprints")
-        if previous_source_footprints is None:
-            self.previous_source_footprints = {}
-        else:
-            self.previous_source_footprints = previous_source_footprints
 
     def load_theme(self) -> None:
         """
@@ -517,10 +525,22 @@ class Site:
         """
         Load site page and assets from scanned content roots.
         """
+        from .preparse import PreparseJob, preparse
+
+        # Parse source files in parallel
+        jobs: list[PreparseJob] = []
+        for tree in self.fstrees.values():
+            if isinstance(tree, fstree.PageTree):
+                tree.collect_preparse_jobs(jobs)
+        self.preparsed = preparse(self, jobs)
+
         # Turn scanned filesytem information into site structure
-        for abspath, tree in self.fstrees.items():
-            with tree.open_tree():
-                tree.populate_node()
+        try:
+            for abspath, tree in self.fstrees.items():
+                with tree.open_tree():
+                    tree.populate_node()
+        finally:
+            self.preparsed = {}
 
     def load(self, until: int = LOAD_STEP_ALL) -> None:
         """
@@ -608,6 +628,13 @@ class Site:
         for feature in self.features.ordered():
             feature.crossreference()
 
+        # The site structure is now stable, and page queries can be indexed
+        from .node import PathIndex
+        from .page_filter import PageIndex
+
+        self.page_index = PageIndex(self)
+        self.path_index = PathIndex(self)
+
     def slugify(self, text: str) -> str:
         """
         Return the slug version of an arbitrary string, that can be used as an
@@ -618,12 +645,7 @@ class Site:
         return slugify(text)
 
     def localized_timestamp(self, ts: float) -> datetime.datetime:
-        return datetime.datetime.fromtimestamp(ts, tz=pytz.utc).astimezone(
-            self.timezone
-        )
-
-    # TODO: support partial dates?
-    re_isodate = re.compile(r"^(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})(Z|\+\d{2}.*)$")
+        return datetime.datetime.fromtimestamp(ts, tz=self.timezone)
 
     def clean_date(self, date: str | datetime.datetime) -> datetime.datetime:
         """
@@ -635,21 +657,11 @@ class Site:
         clean_date: datetime.datetime
         # Make sure we have a datetime
         if not isinstance(date, datetime.datetime):
-            mo = self.re_isodate.match(date)
-            if mo:
-                if mo.group(2) == "Z":
-                    clean_date = datetime.datetime.fromisoformat(mo.group(1)).replace(
-                        tzinfo=pytz.utc
-                    )
-                else:
-                    clean_date = datetime.datetime.fromisoformat(date)
-            else:
-                # TODO: log a fallback on dateutil?
-                try:
-                    clean_date = dateutil.parser.parse(date)
-                except ValueError as e:
-                    log.warning("cannot parse datetime %s: %s", date, e)
-                    return self.generation_time
+            try:
+                clean_date = parse_date(date)
+            except ValueError as e:
+                log.warning("cannot parse datetime %s: %s", date, e)
+                return self.generation_time
         else:
             clean_date = date
 
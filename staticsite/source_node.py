@@ -54,13 +54,6 @@ class SourceNode(Node):
                 "Node.create_source_page created after the 'contents' step has completed"
             )
 
-        if self.site.previous_source_footprints:
-            # TODO: since we pop, we lose fooprint info for assets that replace other assets.
-            # TODO: propagate it when doing the replacement?
-            kw["old_footprint"] = self.site.previous_source_footprints.pop(
-                src.relpath, None
-            )
-
         if date is None:
             date = self.site.localized_timestamp(src.stat.st_mtime)
         else:
@@ -138,13 +131,6 @@ class SourcePageNode(SourceNode):
                 "Node.create_source_page created after the 'contents' step has completed"
             )
 
-        if self.site.previous_source_footprints:
-            # TODO: since we pop, we lose fooprint info for assets that replace other assets.
-            # TODO: propagate it when doing the replacement?
-            kw["old_footprint"] = self.site.previous_source_footprints.pop(
-                src.relpath, None
-            )
-
         if date is None:
             date = self.site.localized_timestamp(src.stat.st_mtime)
         else:
@@ -182,13 +168,6 @@ class SourcePageNode(SourceNode):
                 "Node.create_source_page created after the 'contents' step has completed"
             )
 
-        if self.site.previous_source_footprints:
-            # TODO: since we pop, we lose fooprint info for assets that replace other assets.
-            # TODO: propagate it when doing the replacement?
-            kw["old_footprint"] = self.site.previous_source_footprints.pop(
-                src.relpath, None
-            )
-
         if date is None:
             date = self.site.localized_timestamp(src.stat.st_mtime)
         else:
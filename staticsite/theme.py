@@ -9,14 +9,20 @@ from collections.abc import Callable, MutableMapping, Sequence
 from typing import TYPE_CHECKING, Any
 
 import jinja2
-import jinja2.sandbox
 import markupsafe
 
 from . import toposort
+from .cache import DisabledCache
 from .file import File
+from .footprints import digest
 from .page import ImagePage, Page, PageNotFoundError
 from .utils import front_matter
 from .utils.arrange import arrange
+from .utils.jinja2_ext import (
+    FragmentCache,
+    FragmentCacheExtension,
+    TemplateProfiler,
+)
 
 if TYPE_CHECKING:
     from .page import Pages
@@ -130,6 +136,7 @@ class Jinja2TemplateLoader(jinja2.loaders.BaseLoader):
     re_content = re.compile(r"^content:(.+)")
 
     def __init__(self, theme: Theme):
+        self.theme = theme
         self.loader_content = jinja2.FileSystemLoader(theme.site.content_root)
         self.loader_theme = jinja2.FileSystemLoader(theme.template_lookup_paths)
 
@@ -160,11 +167,14 @@ class Jinja2TemplateLoader(jinja2.loaders.BaseLoader):
     ) -> jinja2.Template:
         loader, local_name = self.get_loader(name)
         try:
-            return loader.load(environment, local_name, globals)
+            template = loader.load(environment, local_name, globals)
         except jinja2.TemplateNotFound:
             # re-raise the exception with the correct filename here.
             # (the one that includes the prefix)
             raise jinja2.TemplateNotFound(name)
+        if (profiler := self.theme.template_profiler) is not None:
+            profiler.instrument(template)
+        return template
 
     def list_templates(self) -> list[str]:
         result = []
@@ -175,6 +185,24 @@ class Jinja2TemplateLoader(jinja2.loaders.BaseLoader):
         return result
 
 
+class Jinja2BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    Store compiled templates across builds.
+
+    Jinja2 already invalidates entries using a checksum of the template
+    source: this also keeps separate entries for sandboxed and unsandboxed
+    environments, which compile templates differently.
+    """
+
+    def __init__(self, directory: str, sandboxed: bool):
+        super().__init__(directory)
+        self.sandboxed = sandboxed
+
+    def get_cache_key(self, name: str, filename: str | None = None) -> str:
+        mode = "sandboxed" if self.sandboxed else "unsandboxed"
+        return super().get_cache_key(f"{mode}:{name}", filename)
+
+
 class Theme:
     def __init__(self, site: Site, name: str, configs: list[dict[str, Any]]):
         # Site object
@@ -190,6 +218,15 @@ class Theme:
         # Jinja2 Environment
         self.jinja2: jinja2.Environment
 
+        # Fragments rendered with {% cache %}
+        self.fragment_cache: FragmentCache
+
+        # Template render times, if JINJA2_PROFILE is set
+        self.template_profiler: TemplateProfiler | None = None
+
+        # Templates compiled from strings, by source
+        self.compiled_templates: dict[str, jinja2.Template] = {}
+
         # Compute template lookup paths
         self.template_lookup_paths: list[str] = []
         for config in reversed(self.configs):
@@ -269,15 +306,38 @@ class Theme:
         env_cls: type[jinja2.Environment]
         # Jinja2 template engine
         if self.site.settings.JINJA2_SANDBOXED:
-            env_cls = jinja2.sandbox.ImmutableSandboxedEnvironment
+            from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+            env_cls = ImmutableSandboxedEnvironment
         else:
             env_cls = jinja2.Environment
 
+        # Compiled templates kept across builds
+        bytecode_cache: jinja2.BytecodeCache | None = None
+        if (cache_dir := self.site.caches.get_dir("jinja2")) is not None:
+            bytecode_cache = Jinja2BytecodeCache(
+                cache_dir, sandboxed=self.site.settings.JINJA2_SANDBOXED
+            )
+
         self.jinja2 = env_cls(
             loader=Jinja2TemplateLoader(self),
             autoescape=True,
+            bytecode_cache=bytecode_cache,
+            extensions=[FragmentCacheExtension],
         )
 
+        if self.site.settings.JINJA2_PERSIST_FRAGMENTS:
+            self.fragment_cache = FragmentCache(
+                self.site.caches.get("template_fragments"),
+                templates_digest=self.templates_digest(),
+            )
+        else:
+            self.fragment_cache = FragmentCache(DisabledCache("template_fragments"))
+        self.jinja2.fragment_cache = self.fragment_cache  # type: ignore
+
+        if self.site.settings.JINJA2_PROFILE:
+            self.template_profiler = TemplateProfiler()
+
         # Add settings to jinja2 globals
         for x in dir(self.site.settings):
             if not x.isupper():
@@ -310,6 +370,40 @@ class Theme:
             self.jinja2.globals.update(feature.j2_globals)
             self.jinja2.filters.update(feature.j2_filters)
 
+    def templates_digest(self) -> str:
+        """
+        Compute a digest of the names, sizes and modification times of the
+        files in the template lookup paths.
+
+        Static asset directories are skipped, as they do not contain
+        templates.
+        """
+        entries: list[tuple[str, str, float, int]] = []
+        for root in self.template_lookup_paths:
+            for dirpath, dirnames, filenames in os.walk(root):
+                if dirpath == root and "static" in dirnames:
+                    dirnames.remove("static")
+                dirnames.sort()
+                for fname in sorted(filenames):
+                    pathname = os.path.join(dirpath, fname)
+                    st = os.stat(pathname)
+                    entries.append(
+                        (root, os.path.relpath(pathname, root), st.st_mtime, st.st_size)
+                    )
+        return digest(entries)
+
+    def from_string(self, source: str) -> jinja2.Template:
+        """
+        Compile a template from a string, reusing the compiled version if the
+        same source was already compiled
+        """
+        if (template := self.compiled_templates.get(source)) is None:
+            template = self.jinja2.from_string(source)
+            if self.template_profiler is not None:
+                self.template_profiler.instrument(template)
+            self.compiled_templates[source] = template
+        return template
+
     def scan_assets(self) -> None:
         """
         Load static assets
@@ -455,7 +549,7 @@ class Theme:
     @jinja2.pass_context
     def jinja2_site_pages(
         self, context: jinja2.runtime.Context, **kw: Any
-    ) -> list[Page]:
+    ) -> Sequence[Page]:
         cur_page: Page | None = context.get("page")
         if cur_page is None:
             log.warning(
@@ -8,8 +8,6 @@ import time
 from collections.abc import Generator
 from typing import Any
 
-import pytz
-
 log = logging.getLogger("utils")
 
 
@@ -20,7 +18,7 @@ def format_date_rfc822(dt: datetime.datetime) -> str:
 
 
 def format_date_rfc3339(dt: datetime.datetime) -> str:
-    dt = dt.astimezone(pytz.utc)
+    dt = dt.astimezone(datetime.timezone.utc)
     return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
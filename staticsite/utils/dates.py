@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import datetime
+import functools
+import re
+import zoneinfo
+
+# Date or datetime followed by a timezone name, like "2020-01-02 12:00 Europe/Rome"
+re_date_tzname = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?)\s+([A-Za-z][A-Za-z0-9_+/-]*)$"
+)
+
+
+def _parse_tzname(name: str) -> datetime.tzinfo | None:
+    """
+    Return the timezone with the given name, or None if it is not known
+    """
+    if name in ("UTC", "GMT", "Z"):
+        return datetime.timezone.utc
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date(date: str) -> datetime.datetime:
+    """
+    Parse a date string into a datetime, which may be naive if the string
+    does not specify a timezone.
+
+    The common front matter forms ("2020-01-02", "2020-01-02 12:00",
+    optionally with seconds, an UTC offset, or a timezone name) are parsed
+    directly; anything else is delegated to dateutil.
+
+    Results are cached by the raw string, since the same dates tend to be
+    parsed many times during a build.
+
+    Raises ValueError if the string cannot be parsed.
+    """
+    try:
+        res = datetime.datetime.fromisoformat(date)
+    except ValueError:
+        pass
+    else:
+        return res
+
+    if mo := re_date_tzname.match(date):
+        if (tz := _parse_tzname(mo.group(2))) is not None:
+            return datetime.datetime.fromisoformat(mo.group(1)).replace(tzinfo=tz)
+
+    import dateutil.parser
+
+    return dateutil.parser.parse(date)
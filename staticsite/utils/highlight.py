@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import threading
+from collections import Counter
+from collections.abc import Callable, Generator, Iterable
+from typing import TYPE_CHECKING, Any
+
+from staticsite.footprints import digest
+
+if TYPE_CHECKING:
+    from pygments.formatter import Formatter
+    from pygments.lexer import Lexer
+
+    from staticsite.cache import Cache
+
+# Highlight cache used by the markup renderer running in the current thread
+active: contextvars.ContextVar[HighlightCache | None] = contextvars.ContextVar(
+    "highlight_cache", default=None
+)
+
+
+def _describe(obj: Lexer | Formatter) -> list[Any]:
+    """
+    Describe a lexer or formatter by class and options, to use in cache keys
+    """
+    cls = type(obj)
+    return [f"{cls.__module__}.{cls.__qualname__}", obj.options]
+
+
+class HighlightCache:
+    """
+    Syntax highlighted code, shared by all markup renderers and kept across
+    builds.
+
+    Highlighting results are keyed by lexer, output options and code, so
+    code blocks are only highlighted again when they change.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+        # Results computed or loaded during this build, by cache key
+        self.results: dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str, compute: Callable[[], Any]) -> Any:
+        if (res := self.results.get(key)) is not None:
+            self.hits += 1
+            return res
+        if (res := self.cache.get(key)) is None:
+            self.misses += 1
+            res = compute()
+            self.cache.put(key, res)
+        else:
+            self.hits += 1
+        self.results[key] = res
+        return res
+
+    @contextlib.contextmanager
+    def use(self) -> Generator[None, None, None]:
+        """
+        Use this cache for highlighting code in the current thread
+        """
+        token = active.set(self)
+        try:
+            yield
+        finally:
+            active.reset(token)
+
+    @contextlib.contextmanager
+    def use_markdown(self) -> Generator[None, None, None]:
+        """
+        Use this cache for code highlighted by python-markdown in the current
+        thread
+        """
+        with self.use(), _patched("markdown", _patch_markdown):
+            yield
+
+    @contextlib.contextmanager
+    def use_docutils(self) -> Generator[None, None, None]:
+        """
+        Use this cache for code highlighted by docutils in the current thread
+        """
+        with self.use(), _patched("docutils", _patch_docutils):
+            yield
+
+    def highlight(self, code: str, lexer: Lexer, formatter: Formatter) -> str:
+        """
+        Format highlighted code, as done by pygments.highlight
+        """
+        import pygments
+
+        key = "html:" + digest([_describe(lexer), _describe(formatter), code])
+        return self._lookup(key, lambda: pygments.highlight(code, lexer, formatter))
+
+    def classified_tokens(
+        self,
+        code: str,
+        lexer: Lexer,
+        tokennames: str,
+        compute: Callable[[], Iterable[tuple[list[str], str]]],
+    ) -> list[tuple[list[str], str]]:
+        """
+        Return the tokens computed by docutils' code analyzer
+        """
+        key = "docutils:" + digest([_describe(lexer), tokennames, code])
+        return [
+            (classes, value)
+            for classes, value in self._lookup(
+                key, lambda: [[classes, value] for classes, value in compute()]
+            )
+        ]
+
+
+def _highlight(
+    code: str, lexer: Lexer, formatter: Formatter, outfile: Any = None
+) -> Any:
+    """
+    pygments.highlight replacement for python-markdown's codehilite
+    """
+    import pygments
+
+    if outfile is not None or (cache := active.get()) is None:
+        return pygments.highlight(code, lexer, formatter, outfile)
+    return cache.highlight(code, lexer, formatter)
+
+
+# Neither python-markdown's codehilite nor docutils' code directive and role
+# have a hook for the highlighting step, so the functions they use are
+# replaced while a highlight cache is in use, and restored afterwards. The
+# replacements fall back to the original behaviour in threads where no cache
+# is active.
+_patch_lock = threading.Lock()
+# Number of active users of each set of patches
+_patch_users: dict[str, int] = Counter()
+# Original values replaced by each active set of patches
+_patch_originals: dict[str, list[tuple[Any, str, Any]]] = {}
+
+
+def _replace(obj: Any, attr: str, value: Any) -> tuple[Any, str, Any]:
+    """
+    Set an attribute, returning what is needed to restore it
+    """
+    original = (obj, attr, getattr(obj, attr))
+    setattr(obj, attr, value)
+    return original
+
+
+@contextlib.contextmanager
+def _patched(
+    name: str, apply: Callable[[], list[tuple[Any, str, Any]]]
+) -> Generator[None, None, None]:
+    """
+    Keep a set of patches applied while at least one caller needs them
+    """
+    with _patch_lock:
+        if _patch_users[name] == 0:
+            _patch_originals[name] = apply()
+        _patch_users[name] += 1
+    try:
+        yield
+    finally:
+        with _patch_lock:
+            _patch_users[name] -= 1
+            if _patch_users[name] == 0:
+                for obj, attr, value in reversed(_patch_originals.pop(name)):
+                    setattr(obj, attr, value)
+
+
+def _patch_markdown() -> list[tuple[Any, str, Any]]:
+    """
+    Make python-markdown's codehilite use the active highlight cache
+    """
+    import markdown.extensions.codehilite
+
+    return [_replace(markdown.extensions.codehilite, "highlight", _highlight)]
+
+
+@functools.cache
+def _docutils_lexer() -> type:
+    """
+    Return a docutils code analyzer that uses the active highlight cache
+    """
+    import docutils.utils.code_analyzer
+
+    class Lexer(docutils.utils.code_analyzer.Lexer):
+        def __iter__(self) -> Generator[tuple[list[str], str], None, None]:
+            if self.lexer is None or (cache := active.get()) is None:
+                yield from super().__iter__()
+                return
+            yield from cache.classified_tokens(
+                self.code, self.lexer, self.tokennames, super().__iter__
+            )
+
+    return Lexer
+
+
+def _patch_docutils() -> list[tuple[Any, str, Any]]:
+    """
+    Make docutils' code directive and role use the active highlight cache
+    """
+    import docutils.parsers.rst.directives.body
+    import docutils.parsers.rst.roles
+
+    return [
+        _replace(module, "Lexer", _docutils_lexer())
+        for module in (docutils.parsers.rst.directives.body, docutils.parsers.rst.roles)
+    ]
@@ -7,9 +7,6 @@ import shlex
 import subprocess
 from typing import TYPE_CHECKING, Any
 
-import PIL
-import PIL.Image
-
 if TYPE_CHECKING:
     from staticsite.cache import Cache
     from staticsite.file import File
@@ -45,6 +42,8 @@ class ImageScanner:
         if mimetype == "image/svg+xml":
             return {}
 
+        import PIL.Image
+
         with PIL.Image.open(pathname) as img:
             meta = {
                 "width": img.width,
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from typing import IO, TYPE_CHECKING, Any
+
+import jinja2
+import markupsafe
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from staticsite.footprints import digest
+from staticsite.page import ChangeExtent, Page
+
+if TYPE_CHECKING:
+    from jinja2.parser import Parser
+
+    from staticsite.cache import Cache
+
+
+class FragmentCache:
+    """
+    Template fragments rendered with ``{% cache %}``.
+
+    Fragments are reused for the whole build, and can be kept across builds
+    if a persistent cache is given. Persisted fragments are only reused if
+    none of the pages referenced in their key changed since the last build,
+    and ``templates_digest`` (which identifies the version of the theme
+    templates) is the same.
+    """
+
+    def __init__(self, cache: Cache, templates_digest: str = ""):
+        self.cache = cache
+        self.templates_digest = templates_digest
+        # Fragments rendered or loaded during this build, by cache key
+        self.fragments: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _describe(self, value: Any, pages: list[Page]) -> Any:
+        """
+        Turn a cache key argument into something that can go in a digest,
+        collecting referenced pages
+        """
+        if isinstance(value, Page):
+            pages.append(value)
+            return ["page", value.site_path]
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        elif isinstance(value, Sequence):
+            return [self._describe(v, pages) for v in value]
+        else:
+            return str(value)
+
+    def render(
+        self, block_id: str, args: Sequence[Any], caller: Callable[[], str]
+    ) -> str:
+        """
+        Return the rendered fragment for the given block and key, rendering it
+        with ``caller`` if needed
+        """
+        pages: list[Page] = []
+        key = digest([self.templates_digest, block_id, self._describe(args, pages)])
+
+        if (res := self.fragments.get(key)) is not None:
+            self.hits += 1
+            return markupsafe.Markup(res)
+
+        if (
+            all(page.change_extent == ChangeExtent.UNCHANGED for page in pages)
+            and (res := self.cache.get(key)) is not None
+        ):
+            self.hits += 1
+        else:
+            self.misses += 1
+            res = str(caller())
+            self.cache.put(key, res)
+
+        self.fragments[key] = res
+        return markupsafe.Markup(res)
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Add a ``{% cache key, deps... %}...{% endcache %}`` tag that renders its
+    body only once for each distinct combination of key and dependencies.
+
+    The cache is looked up in the ``fragment_cache`` attribute of the
+    environment: if it is None, the body is rendered every time.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: jinja2.Environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+
+        # Identify the block by template and contents, so that changes to the
+        # template invalidate persisted fragments. Changes to other templates
+        # are tracked by FragmentCache.templates_digest
+        block_id = digest([parser.name, repr(body)])
+
+        return nodes.CallBlock(
+            self.call_method("_render", [nodes.Const(block_id), nodes.List(args)]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    def _render(self, block_id: str, args: list[Any], caller: Callable[[], str]) -> str:
+        cache: FragmentCache | None = getattr(self.environment, "fragment_cache")
+        if cache is None:
+            return caller()
+        return cache.render(block_id, args, caller)
+
+
+RenderFunc = Callable[[jinja2.runtime.Context], Iterator[str]]
+
+
+class TimedRenderFunc:
+    """
+    Template render function timed by a TemplateProfiler.
+
+    It compares equal to the function it wraps, since compiled templates look
+    up their own block functions in the render context when calling
+    ``super()``.
+    """
+
+    def __init__(self, profiler: TemplateProfiler, name: str, func: RenderFunc):
+        self.profiler = profiler
+        self.name = name
+        self.func = func
+
+    def __call__(self, context: jinja2.runtime.Context) -> Iterator[str]:
+        profiler = self.profiler
+        profiler.calls[self.name] += 1
+        gen = self.func(context)
+        while True:
+            profiler.enter(self.name)
+            try:
+                chunk = next(gen)
+            except StopIteration:
+                return
+            finally:
+                profiler.leave()
+            yield chunk
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TimedRenderFunc):
+            return self.func == other.func
+        return self.func == other
+
+    def __hash__(self) -> int:
+        return hash(self.func)
+
+
+class TemplateProfiler:
+    """
+    Accumulate time spent rendering each template and block.
+
+    Times are tracked by call stack, and can be written out in the collapsed
+    stack format used by flame graph tools.
+    """
+
+    def __init__(self) -> None:
+        # Stack of [frame name, start time, time spent in nested frames]
+        self.stack: list[list[Any]] = []
+        # Exclusive time in nanoseconds by call stack
+        self.stacks: dict[tuple[str, ...], int] = Counter()
+        # Inclusive and exclusive times in nanoseconds by frame name
+        self.inclusive: dict[str, int] = Counter()
+        self.exclusive: dict[str, int] = Counter()
+        # Number of times a frame was entered
+        self.calls: dict[str, int] = Counter()
+
+    def enter(self, name: str) -> None:
+        self.stack.append([name, time.perf_counter_ns(), 0])
+
+    def leave(self) -> None:
+        name, start, nested = self.stack.pop()
+        elapsed = time.perf_counter_ns() - start
+        path = tuple(frame[0] for frame in self.stack) + (name,)
+        self.stacks[path] += elapsed - nested
+        self.exclusive[name] += elapsed - nested
+        # Do not count recursive calls twice
+        if name not in path[:-1]:
+            self.inclusive[name] += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def instrument(self, template: jinja2.Template) -> jinja2.Template:
+        """
+        Time the rendering of the template and of each of its blocks.
+
+        Rendering, inclusion and inheritance all go through the template's
+        ``root_render_func`` and ``blocks``, which are replaced with timed
+        versions. Instrumenting a template twice has no effect.
+        """
+        if isinstance(template.root_render_func, TimedRenderFunc):
+            return template
+        name = template.name or "(string)"
+        template.root_render_func = TimedRenderFunc(
+            self, name, template.root_render_func
+        )
+        for block_name, func in template.blocks.items():
+            template.blocks[block_name] = TimedRenderFunc(
+                self, f"{name}:{block_name}", func
+            )
+        return template
+
+    def write_collapsed(self, out: IO[str]) -> None:
+        """
+        Write exclusive times in microseconds in collapsed stack format, as
+        used by flamegraph.pl or speedscope
+        """
+        for path, elapsed in sorted(self.stacks.items()):
+            print(";".join(path), elapsed // 1000, file=out)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+import markdown
+import markdown.extensions
+import markdown.treeprocessors
+from markdown.util import AMP_SUBSTITUTE
+
+from staticsite.page import ImagePage
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+    from staticsite.markup import LinkResolver
+    from staticsite.page import Page
+
+log = logging.getLogger("markdown")
+
+
+class FixURLs(markdown.treeprocessors.Treeprocessor):
+    """
+    Markdown Treeprocessor that fixes internal links in HTML tags
+    """
+
+    def __init__(self, *args: Any, link_resolver: LinkResolver, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.link_resolver = link_resolver
+
+    def should_resolve(self, url: str) -> bool:
+        if url.startswith(AMP_SUBSTITUTE):
+            # Possibly an overencoded mailto: link.
+            # see https://bugs.debian.org/816218
+            #
+            # Markdown then further escapes & with utils.AMP_SUBSTITUTE, so
+            # we look for it here.
+            return False
+        return True
+
+    def run(self, root: ET.ElementTree) -> None:
+        # Replace <a href=…>
+        for a in root.iter("a"):
+            if (orig_url := a.attrib.get("href", None)) is None:
+                continue
+
+            if not self.should_resolve(orig_url):
+                continue
+
+            new_url = self.link_resolver.resolve_url(orig_url)
+            if new_url is not None:
+                a.attrib["href"] = new_url
+
+        # Replace <img src=…>
+        for img in root.iter("img"):
+            if (orig_url := img.attrib.get("src", None)) is None:
+                continue
+
+            if not self.should_resolve(orig_url):
+                continue
+
+            if (resolved := self.link_resolver.resolve_page(orig_url)) is None:
+                continue
+
+            if isinstance(resolved.page, ImagePage):
+                attrs = resolved.page.get_img_attributes(
+                    absolute=self.link_resolver.absolute
+                )
+            else:
+                log.warning(
+                    "%s: img src= resolves to %s which is not an image page",
+                    self.link_resolver.page,
+                    resolved.page,
+                )
+                continue
+
+            img.attrib.update(attrs)
+
+
+class StaticSiteExtension(markdown.extensions.Extension):
+    def __init__(self, *, link_resolver: LinkResolver, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.link_resolver = link_resolver
+
+    def extendMarkdown(self, md: markdown.Markdown) -> None:
+        md.treeprocessors.register(
+            FixURLs(md, link_resolver=self.link_resolver), "staticsite", 0
+        )
+        md.registerExtension(self)
+
+    def reset(self) -> None:
+        pass
+
+    def set_page(self, page: Page, absolute: bool) -> None:
+        self.link_resolver.set_page(page, absolute)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+from markdown_it import MarkdownIt
+from markdown_it.common.utils import unescapeAll
+
+from staticsite.page import ImagePage
+
+if TYPE_CHECKING:
+    from markdown_it.renderer import RendererHTML
+    from markdown_it.rules_core import StateCore
+    from markdown_it.token import Token
+    from markdown_it.utils import EnvType, OptionsDict
+
+    from staticsite.markup import LinkResolver
+    from staticsite.utils.highlight import HighlightCache
+
+log = logging.getLogger("markdown")
+
+
+class FixURLs:
+    """
+    markdown-it core rule that fixes internal links in link and image tokens
+    """
+
+    def __init__(self, link_resolver: LinkResolver) -> None:
+        self.link_resolver = link_resolver
+
+    def fix_link(self, token: Token) -> None:
+        if (orig_url := token.attrGet("href")) is None:
+            return
+        new_url = self.link_resolver.resolve_url(str(orig_url))
+        if new_url is not None:
+            token.attrSet("href", new_url)
+
+    def fix_image(self, token: Token) -> None:
+        if (orig_url := token.attrGet("src")) is None:
+            return
+
+        if (resolved := self.link_resolver.resolve_page(str(orig_url))) is None:
+            return
+
+        if isinstance(resolved.page, ImagePage):
+            attrs = resolved.page.get_img_attributes(
+                absolute=self.link_resolver.absolute
+            )
+        else:
+            log.warning(
+                "%s: img src= resolves to %s which is not an image page",
+                self.link_resolver.page,
+                resolved.page,
+            )
+            return
+
+        for name, value in attrs.items():
+            token.attrSet(name, value)
+
+    def fix_tokens(self, tokens: Sequence[Token]) -> None:
+        for token in tokens:
+            if token.type == "link_open":
+                self.fix_link(token)
+            elif token.type == "image":
+                self.fix_image(token)
+            if token.children:
+                self.fix_tokens(token.children)
+
+    def __call__(self, state: StateCore) -> None:
+        self.fix_tokens(state.tokens)
+
+
+class HighlightFences:
+    """
+    markdown-it fence renderer that highlights code with Pygments, producing
+    the same markup as python-markdown's codehilite
+    """
+
+    def __init__(self, highlight_cache: HighlightCache) -> None:
+        from pygments.formatters import HtmlFormatter
+
+        self.highlight_cache = highlight_cache
+        self.formatter = HtmlFormatter(cssclass="codehilite", wrapcode=True)
+
+    def highlight(self, code: str, lang: str) -> str | None:
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+
+        try:
+            lexer = get_lexer_by_name(lang)
+        except ClassNotFound:
+            return None
+        return self.highlight_cache.highlight(code, lexer, self.formatter)
+
+    def __call__(
+        self,
+        renderer: RendererHTML,
+        tokens: Sequence[Token],
+        idx: int,
+        options: OptionsDict,
+        env: EnvType,
+    ) -> str:
+        token = tokens[idx]
+        if token.info:
+            info = unescapeAll(token.info).split(maxsplit=1)
+            if info and (highlighted := self.highlight(token.content, info[0])):
+                return highlighted
+        return renderer.fence(tokens, idx, options, env)
+
+
+def staticsite_plugin(
+    md: MarkdownIt, *, link_resolver: LinkResolver, highlight_cache: HighlightCache
+) -> None:
+    """
+    Resolve links to site pages and highlight code blocks
+    """
+    md.core.ruler.push("staticsite", FixURLs(link_resolver))
+    fence = HighlightFences(highlight_cache)
+
+    def render_fence(self: RendererHTML, *args: Any) -> str:
+        return fence(self, *args)
+
+    md.add_render_rule("fence", render_fence)
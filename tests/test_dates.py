@@ -0,0 +1,52 @@
+import datetime
+import zoneinfo
+from unittest import TestCase
+
+import pytz
+
+from staticsite.utils.dates import parse_date
+
+
+class TestParseDate(TestCase):
+    def test_naive(self):
+        self.assertEqual(parse_date("2020-01-02"), datetime.datetime(2020, 1, 2))
+        self.assertEqual(
+            parse_date("2020-01-02 12:30"), datetime.datetime(2020, 1, 2, 12, 30)
+        )
+        self.assertEqual(
+            parse_date("2020-01-02T12:30:15"),
+            datetime.datetime(2020, 1, 2, 12, 30, 15),
+        )
+
+    def test_offset(self):
+        self.assertEqual(
+            parse_date("2020-01-02 12:30:00Z"),
+            datetime.datetime(2020, 1, 2, 12, 30, tzinfo=pytz.utc),
+        )
+        self.assertEqual(
+            parse_date("2020-01-02 12:30+02:00"),
+            datetime.datetime(2020, 1, 2, 10, 30, tzinfo=pytz.utc),
+        )
+        self.assertEqual(
+            parse_date("2020-01-02 12:30:00+0200"),
+            datetime.datetime(2020, 1, 2, 10, 30, tzinfo=pytz.utc),
+        )
+
+    def test_tzname(self):
+        dt = parse_date("2020-01-02 12:30 Europe/Rome")
+        self.assertEqual(dt.tzinfo, zoneinfo.ZoneInfo("Europe/Rome"))
+        self.assertEqual(dt, datetime.datetime(2020, 1, 2, 11, 30, tzinfo=pytz.utc))
+        self.assertEqual(
+            parse_date("2020-01-02 12:30 UTC"),
+            datetime.datetime(2020, 1, 2, 12, 30, tzinfo=pytz.utc),
+        )
+
+    def test_fallback(self):
+        self.assertEqual(
+            parse_date("Jan 2 2020 12:30"), datetime.datetime(2020, 1, 2, 12, 30)
+        )
+        with self.assertRaises(ValueError):
+            parse_date("not a date")
+
+    def test_cached(self):
+        self.assertIs(parse_date("2021-03-04 05:06"), parse_date("2021-03-04 05:06"))
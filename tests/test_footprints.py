@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import tempfile
+from unittest import TestCase, mock
+
+from staticsite import cache as ss_cache
+from staticsite.cache import Caches
+from staticsite.footprints import Footprints, digest
+from staticsite.page import ChangeExtent
+from staticsite.site import Site
+
+from . import utils as test_utils
+
+
+class TestFootprints(TestCase):
+    def test_digest(self):
+        self.assertEqual(digest({"a": 1, "b": [1, 2]}), digest({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(digest({"a": 1}), digest({"a": 2}))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            cache = Caches(root).get("build")
+            footprints = Footprints(cache)
+            footprints.save(
+                [
+                    ("index.md", {"mtime": 1, "size": 10}),
+                    ("dir/page.md", {"mtime": 2, "size": 20}),
+                    ("dir/page1.md", {"mtime": 3, "size": 30}),
+                ]
+            )
+
+            footprints = Footprints(cache)
+            self.assertEqual(footprints.get("index.md"), {"mtime": 1, "size": 10})
+            self.assertEqual(footprints.get("dir/page.md"), {"mtime": 2, "size": 20})
+            self.assertIsNone(footprints.get("dir/missing.md"))
+            self.assertIsNone(footprints.get("missing/page.md"))
+            self.assertEqual(footprints.deleted("dir", ["page.md"]), {"page1.md"})
+            self.assertEqual(footprints.deleted("", ["index.md"]), set())
+
+            # Pages removed from a directory are deleted from the cache
+            footprints.save(
+                [
+                    ("index.md", {"mtime": 1, "size": 10}),
+                    ("dir/page.md", {"mtime": 2, "size": 20}),
+                    ("dir/renamed.md", {"mtime": 3, "size": 30}),
+                ]
+            )
+            self.assertIsNone(cache.get("footprint:dir/page1.md"))
+            self.assertIsNotNone(cache.get("footprint:dir/page.md"))
+
+            # Deleted pages and directories are forgotten
+            footprints.save([("index.md", {"mtime": 1, "size": 10})])
+            footprints = Footprints(cache)
+            self.assertIsNone(footprints.get("dir/page.md"))
+            self.assertEqual(footprints.listing("dir"), frozenset())
+            self.assertIsNone(cache.get("footprint:dir/page.md"))
+            self.assertIsNone(cache.get("footprint:dir/renamed.md"))
+            self.assertIsNone(cache.get("footprint_dir:dir"))
+
+            footprints.clear()
+            self.assertIsNone(footprints.get("index.md"))
+            self.assertIsNone(cache.get("footprint:index.md"))
+            self.assertEqual(cache.get("footprint_dirs"), [])
+
+            cache.db.close()
+
+
+class TestIncremental(test_utils.MockSiteTestMixin, TestCase):
+    def test_rebuild(self):
+        files = {
+            "index.md": {"title": "Index"},
+            "page.md": {"title": "Page", "date": "2019-01-01 12:00"},
+        }
+        opened = []
+
+        class TrackedCache(ss_cache.CacheImplementation):
+            def __init__(self, fname: str):
+                super().__init__(fname)
+                opened.append(self)
+
+        with (
+            mock.patch("staticsite.cache.CacheImplementation", TrackedCache),
+            self.site(files, settings={"CACHE_REBUILDS": True}) as mocksite,
+        ):
+            try:
+                mocksite.build_site()
+
+                site = Site(
+                    mocksite.settings, generation_time=mocksite.site.generation_time
+                )
+                with test_utils.mock_file_stat({"st_mtime": mocksite.mock_file_mtime}):
+                    site.load()
+
+                page = site.root.resolve_path("page")
+                self.assertEqual(page.old_footprint["fm"], page.footprint["fm"])
+                self.assertEqual(page.change_extent, ChangeExtent.UNCHANGED)
+            finally:
+                # Close the databases before their directory is removed
+                for c in opened:
+                    if "db" in c.__dict__:
+                        c.db.close()
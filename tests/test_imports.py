@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from . import utils as test_utils
+
+# Load a site with only markdown content, without rendering it
+LOAD_SITE = """
+import sys
+from staticsite.settings import Settings
+from staticsite.site import Site
+
+settings = Settings()
+settings.PROJECT_ROOT = sys.argv[1]
+settings.THEME_PATHS = [sys.argv[2]]
+settings.TIMEZONE = "Europe/Rome"
+settings.CACHE_REBUILDS = False
+settings.JINJA2_SANDBOXED = False
+site = Site(settings)
+site.load()
+"""
+
+# Modules that should only be imported when the site needs them
+DEFERRED_MODULES = ("docutils", "markdown", "PIL", "jinja2.sandbox", "pytz")
+
+
+class TestImports(TestCase):
+    def get_imported_modules(self, files: dict[str, str]) -> set[str]:
+        """
+        Load a site with the given files in a new interpreter, and return the
+        names of all the modules imported, as listed by ``-X importtime``
+        """
+        with tempfile.TemporaryDirectory() as root:
+            for relpath, content in files.items():
+                with open(os.path.join(root, relpath), "wt") as fd:
+                    fd.write(content)
+
+            env = dict(os.environ)
+            env["PYTHONPATH"] = test_utils.project_root
+            res = subprocess.run(
+                [
+                    sys.executable,
+                    "-X",
+                    "importtime",
+                    "-c",
+                    LOAD_SITE,
+                    root,
+                    os.path.join(test_utils.project_root, "themes"),
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+        modules: set[str] = set()
+        for line in res.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            name = line.rsplit("|", 1)[1].strip()
+            modules.add(name)
+        return modules
+
+    def test_deferred_imports(self):
+        modules = self.get_imported_modules(
+            {"index.md": "---\ntitle: Test\n---\n\ntext\n"}
+        )
+        # Make sure we parsed the importtime output
+        self.assertIn("staticsite.site", modules)
+        for name in DEFERRED_MODULES:
+            self.assertNotIn(name, modules)
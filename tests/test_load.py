@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from unittest import TestCase
+import os
+from unittest import TestCase, mock
+
+from staticsite import preparse
 
 from . import utils as test_utils
 
@@ -50,3 +53,64 @@ class TestLoad(test_utils.MockSiteTestMixin, TestCase):
                     "assets/sub/file1.txt",
                 )
             )
+
+    def test_preparse(self):
+        """
+        Test parsing source files in worker processes
+        """
+        files = {
+            ".staticsite": {"files": {"raw.md": {"asset": True}}},
+            "index.md": {"title": "Index"},
+            "page.md": "# Page title\n\nbody\n",
+            "doc.rst": ":tags: [example]\n\nTitle\n=====\n\nbody `link <page.md>`_\n",
+            "data.yaml": "---\ndata_type: test\ntitle: Data\n",
+            "raw.md": "# Not parsed\n",
+            "taxonomies/tags.taxonomy": {},
+        }
+
+        preparsed = {}
+        real_preparse = preparse.preparse
+
+        def preparse_spy(*args, **kw):
+            res = real_preparse(*args, **kw)
+            preparsed.update(res)
+            return res
+
+        with mock.patch("staticsite.preparse.MIN_JOBS", 0):
+            with self.site(
+                files, auto_load_site=False, settings={"LOAD_WORKERS": 2}
+            ) as mocksite:
+                with mock.patch("staticsite.preparse.preparse", new=preparse_spy):
+                    mocksite.load_site()
+
+                self.assertCountEqual(
+                    [
+                        (feature, os.path.relpath(abspath, mocksite.root))
+                        for feature, abspath in preparsed
+                    ],
+                    [
+                        ("md", "index.md"),
+                        ("md", "page.md"),
+                        ("rst", "doc.rst"),
+                        ("data", "data.yaml"),
+                    ],
+                )
+                self.assertEqual(mocksite.site.preparsed, {})
+
+                index, page, doc, data, raw = mocksite.page(
+                    "", "page", "doc", "data", "raw.md"
+                )
+                self.assertEqual(index.title, "Index")
+                self.assertEqual(page.title, "Page title")
+                self.assertEqual(page.body_start, ["body"])
+                self.assertEqual(doc.title, "Title")
+                self.assertEqual([t.name for t in doc.tags], ["example"])
+                self.assertEqual(data.title, "Data")
+                self.assertEqual(raw.TYPE, "asset")
+
+                mocksite.assertBuilt(
+                    "doc.rst",
+                    "doc",
+                    "doc/index.html",
+                    sample='href="/page"',
+                )
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import threading
+import unittest
+from typing import Any
+from unittest import TestCase, mock
+
+import pygments
+
+from staticsite.features.markdown import (
+    MarkdownItRenderer,
+    MarkdownPage,
+    MarkdownRenderer,
+)
+from staticsite.page import Page
+
+try:
+    import markdown_it  # noqa: F401
+
+    HAVE_MARKDOWN_IT = True
+except ModuleNotFoundError:
+    HAVE_MARKDOWN_IT = False
+
+from . import utils as test_utils
+
+
+class TestMarkdown(test_utils.MockSiteTestMixin, TestCase):
+    def test_renderer_pool(self):
+        with self.site({"index.md": {}}) as mocksite:
+            feature = mocksite.site.features["md"]
+
+            with feature.renderer() as r1:
+                # Nested use gets a different renderer
+                with feature.renderer() as r2:
+                    self.assertIsNot(r1, r2)
+                    self.assertIsNot(r1.link_resolver, r2.link_resolver)
+                    self.assertIsNot(r1.markdown, r2.markdown)
+
+            # Renderers are reused
+            with feature.renderer() as r3:
+                self.assertIn(r3, (r1, r2))
+
+    def test_nested_render(self):
+        files = {
+            "page.md": "[link](page1.md)\n",
+            "page1.md": "[link](page.md)\n",
+        }
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+
+            with page.markup_render_context("test") as context:
+                # Render another page while page is being rendered
+                rendered1 = page1._render_fragments()["start"]
+                self.assertIs(context.link_resolver.page, page)
+                rendered = context.renderer.convert("[link](page1.md)")
+
+            self.assertEqual(rendered, '<p><a href="/page1">link</a></p>')
+            self.assertEqual(rendered1, '<p><a href="/page">link</a></p>')
+
+    def test_resolve_url(self):
+        files = {"page.md": {}, "page1.md": {}}
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            feature = mocksite.site.features["md"]
+            with feature.renderer() as renderer:
+                resolver = renderer.link_resolver
+                resolver.set_page(page)
+                self.assertEqual(resolver.resolve_url("page1.md"), "/page1")
+                self.assertEqual(resolver.resolve_url("page1.md#sec"), "/page1#sec")
+                self.assertEqual(
+                    resolver.resolve_url("page1.md;p?q=1#sec"), "/page1;p?q=1#sec"
+                )
+                self.assertEqual(resolver.resolve_url("#sec"), "#sec")
+                self.assertEqual(
+                    resolver.resolve_url("http://example.org/a.md"),
+                    "http://example.org/a.md",
+                )
+                self.assertIn("page1.md#sec", resolver.resolved_urls)
+
+                resolver.set_page(page, absolute=True)
+                self.assertEqual(
+                    resolver.resolve_url("page1.md?q=1"),
+                    "https://www.example.org/page1?q=1",
+                )
+
+    def test_threads(self):
+        files = {f"page{i}.md": f"[link](page{(i + 1) % 10}.md)\n" for i in range(10)}
+        with self.site(files) as mocksite:
+            pages = mocksite.page(*(f"page{i}" for i in range(10)))
+            results: dict[int, str] = {}
+
+            def render(idx: int) -> None:
+                page = pages[idx]
+                for i in range(20):
+                    results[idx] = page._render_fragments()["start"]
+
+            threads = [threading.Thread(target=render, args=(i,)) for i in range(10)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            for i in range(10):
+                self.assertEqual(
+                    results[i], f'<p><a href="/page{(i + 1) % 10}">link</a></p>'
+                )
+
+    def test_fold(self):
+        files = {
+            "page.md": (
+                "Lead with note[^1] and [ref][r].\n"
+                "\n"
+                "____\n"
+                "\n"
+                "Rest text[^2].\n"
+                "\n"
+                "[^1]: first\n"
+                "[^2]: second\n"
+                "[r]: http://example.org\n"
+            ),
+        }
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            with mock.patch(
+                "staticsite.features.markdown.MarkdownRenderer.convert",
+                autospec=True,
+                side_effect=MarkdownRenderer.convert,
+            ) as convert:
+                fragments = page._render_fragments()
+                page.html_body({"page": page})
+                page.html_inline({"page": page})
+                page.html_feed({"page": page})
+            # The body is converted only once
+            self.assertEqual(convert.call_count, 1)
+
+            start = fragments["start"]
+            self.assertTrue(start.startswith("<p>Lead with note<sup"))
+            self.assertIn('<a href="http://example.org">ref</a>', start)
+            self.assertTrue(fragments["rest"].startswith("<hr>\n<p>Rest text"))
+            self.assertTrue(fragments["footnotes"].startswith('<div class="footnote">'))
+            self.assertTrue(fragments["rest"].endswith(fragments["footnotes"]))
+            self.assertEqual(fragments["continue_url"], "/page")
+            self.assertEqual(page.rendered_external_links, {"http://example.org"})
+
+            context = {"page": page}
+            self.assertEqual(
+                page.html_body(context),
+                start + "\n<p><a name='sep'></a></p>\n" + fragments["rest"],
+            )
+            self.assertEqual(
+                page.html_inline(context),
+                start
+                + '\n<p><a href="/page">(continue reading)</a></p>\n'
+                + fragments["inline_footnotes"],
+            )
+            self.assertEqual(page.html_feed(context), start + "\n" + fragments["rest"])
+
+    def test_fragments_memory(self):
+        files = {"page.md": "Lead.\n\n____\n\nRest.\n", "page1.md": {}}
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+            # Only the fragments for the last link mode are kept
+            page.html_inline({"page": page1})
+            self.assertEqual(page.rendered_fragments[0], True)
+            page.html_body({"page": page})
+            self.assertEqual(page.rendered_fragments[0], False)
+            # They are dropped once the page has been rendered
+            page.render()
+            self.assertIsNone(page.rendered_fragments)
+
+    def test_fold_footnotes(self):
+        files = {
+            "page.md": (
+                "Lead[^1] and more[^3].\n"
+                "\n"
+                "____\n"
+                "\n"
+                "Rest[^2] and lead again[^1].\n"
+                "\n"
+                "[^1]: first\n"
+                "[^2]: second\n"
+                "[^3]: third\n"
+            ),
+            "nofoot.md": "Lead.\n\n____\n\nRest[^1].\n\n[^1]: first\n",
+            # An unclosed html block swallows the fold marker
+            "mangled.md": "Lead\n\n<div>\ntext\n\n____\n\nRest\n",
+        }
+        with self.site(files) as mocksite:
+            page, nofoot, mangled = mocksite.page("page", "nofoot", "mangled")
+
+            fragments = page._render_fragments()
+            inline = page.html_inline({"page": page})
+            # Only footnotes referenced before the fold are shown inline
+            self.assertIn('<li id="fn:1">', inline)
+            self.assertIn('<li value="3" id="fn:3">', inline)
+            self.assertNotIn('id="fn:2"', inline)
+            # Back references only point to the lead
+            self.assertIn('href="#fnref:1"', inline)
+            self.assertNotIn('href="#fnref2:1"', inline)
+            self.assertIn('href="#fnref2:1"', fragments["footnotes"])
+            self.assertNotIn("second", inline)
+            self.assertTrue(inline.endswith("</ol>\n</div>"))
+            self.assertIn('id="fn:2"', fragments["footnotes"])
+
+            # No footnotes block if the lead has no footnotes
+            self.assertEqual(nofoot._render_fragments()["inline_footnotes"], "")
+            self.assertNotIn("footnote", nofoot.html_inline({"page": nofoot}))
+
+            # If the fold cannot be found, the page is shown as a whole,
+            # rendered only once
+            with self.assertLogs("markdown", level="WARNING"):
+                fragments = mangled._render_fragments()
+            self.assertEqual(fragments["rest"], "")
+            self.assertEqual(fragments["footnotes"], "")
+            self.assertEqual(fragments["start"].count("Rest"), 1)
+            self.assertNotIn(MarkdownPage.FOLD_MARKER, fragments["start"])
+
+    def test_snippet_cache(self):
+        files = {
+            "page.md": {},
+            "page1.md": {},
+            "sub/page.md": {},
+        }
+        with self.site(files) as mocksite:
+            feature = mocksite.site.features["md"]
+            page, page1, subpage = mocksite.page("page", "page1", "sub/page")
+            stored: dict[str, dict] = {}
+            feature.render_cache = mock.Mock(get=stored.get, put=stored.__setitem__)
+
+            with mock.patch(
+                "staticsite.features.markdown.MarkdownRenderer.convert",
+                autospec=True,
+                side_effect=MarkdownRenderer.convert,
+            ) as convert:
+                rendered = feature.render_snippet(page, "[link](page1.md)")
+                self.assertEqual(rendered, '<p><a href="/page1">link</a></p>')
+                # The same snippet in the same search root is reused
+                self.assertEqual(
+                    feature.render_snippet(page1, "[link](page1.md)"), rendered
+                )
+                self.assertEqual(convert.call_count, 1)
+
+                # A different search root renders again
+                feature.render_snippet(subpage, "[link](page1.md)")
+                self.assertEqual(convert.call_count, 2)
+
+                # A new build reuses the persisted rendering
+                feature.rendered_snippets.clear()
+                self.assertEqual(
+                    feature.render_snippet(page, "[link](page1.md)"), rendered
+                )
+                self.assertEqual(convert.call_count, 2)
+
+                # Persisted renderings with stale links are rendered again
+                feature.rendered_snippets.clear()
+                for value in stored.values():
+                    value["paths"] = [["page1.md", "sub/page.md"]]
+                    value["rendered"] = "stale"
+                self.assertEqual(
+                    feature.render_snippet(page, "[link](page1.md)"), rendered
+                )
+                self.assertEqual(convert.call_count, 3)
+
+    def test_snippet_cache_cleanup(self):
+        files = {"page.md": {}, "page1.md": {}}
+        with self.site(files) as mocksite:
+            feature = mocksite.site.features["md"]
+            page, page1 = mocksite.page("page", "page1")
+            stored: dict[str, Any] = {}
+
+            def delete_many(keys):
+                for key in keys:
+                    del stored[key]
+
+            feature.render_cache = mock.Mock(
+                get=stored.get, put=stored.__setitem__, delete_many=delete_many
+            )
+
+            def build(snippets: dict[Page, str]) -> set[str]:
+                """
+                Simulate a build where each page renders the given snippet
+                """
+                feature.set_previous_footprint(footprint)
+                feature.snippet_keys = {}
+                feature.rendered_snippets.clear()
+                for page, snippet in snippets.items():
+                    feature.render_snippet(page, snippet)
+                footprint.update(feature.get_footprint())
+                return {v["rendered"] for v in stored.values()}
+
+            footprint: dict[str, Any] = {
+                "snippets": {"removed": ["snippet:removed"], "page": []}
+            }
+            stored["snippet:removed"] = {"rendered": "removed"}
+            # Snippets of pages that no longer exist are deleted
+            self.assertEqual(build({page: "a", page1: "b"}), {"<p>a</p>", "<p>b</p>"})
+            # Snippets that a page stopped using are deleted, and snippets of
+            # pages that were not rendered are kept
+            self.assertEqual(build({page: "c"}), {"<p>b</p>", "<p>c</p>"})
+
+    def test_snippet_cache_bound(self):
+        with self.site({"page.md": {}}) as mocksite:
+            feature = mocksite.site.features["md"]
+            page = mocksite.page("page")
+            feature.max_rendered_snippets = 2
+
+            feature.render_snippet(page, "a")
+            feature.render_snippet(page, "b")
+            # Using a snippet makes it the most recently used
+            feature.render_snippet(page, "a")
+            feature.render_snippet(page, "c")
+            self.assertEqual(
+                list(feature.rendered_snippets.values()), ["<p>a</p>", "<p>c</p>"]
+            )
+
+    def test_highlight_cache(self):
+        code = "```python\ndef f():\n    return 1\n```\n"
+        files = {
+            "page.md": "Text\n\n" + code,
+            "page1.md": "Other text\n\n" + code,
+        }
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+            highlight_cache = mocksite.site.highlight_cache
+            stored: dict[str, Any] = {}
+            highlight_cache.cache = mock.Mock(get=stored.get, put=stored.__setitem__)
+
+            with mock.patch(
+                "pygments.highlight", side_effect=pygments.highlight
+            ) as highlight:
+                rendered = page._render_fragments()["start"]
+                rendered1 = page1._render_fragments()["start"]
+                # The same code is highlighted only once
+                self.assertEqual(highlight.call_count, 1)
+                self.assertIn('<div class="codehilite">', rendered)
+                self.assertEqual(
+                    rendered.split("\n", 1)[1], rendered1.split("\n", 1)[1]
+                )
+
+                # The next build finds it in the persistent cache
+                highlight_cache.results.clear()
+                feature = mocksite.site.features["md"]
+                feature.render_snippet(page, "Snippet\n\n" + code)
+                self.assertEqual(highlight.call_count, 1)
+
+                # Different code is highlighted again
+                feature.render_snippet(page, code.replace("1", "2"))
+                self.assertEqual(highlight.call_count, 2)
+
+            # python-markdown is left as it was outside of rendering
+            import markdown.extensions.codehilite
+
+            self.assertIs(markdown.extensions.codehilite.highlight, pygments.highlight)
+
+    def test_cached_external_links(self):
+        files = {
+            "page.md": "[ext](http://example.org) [int](page1.md)\n",
+            "page1.md": {},
+        }
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            feature = mocksite.site.features["md"]
+            stored: dict[str, dict] = {}
+            feature.render_cache = mock.Mock(get=stored.get, put=stored.__setitem__)
+
+            rendered = page._render_fragments()["start"]
+            self.assertEqual(page.rendered_external_links, {"http://example.org"})
+
+            # A later build reuses the cached rendering, external links included
+            page.rendered_fragments = None
+            page.rendered_external_links.clear()
+            with mock.patch(
+                "staticsite.features.markdown.MarkdownRenderer.convert",
+                autospec=True,
+                side_effect=MarkdownRenderer.convert,
+            ) as convert:
+                self.assertEqual(page._render_fragments()["start"], rendered)
+                self.assertEqual(convert.call_count, 0)
+            self.assertEqual(page.rendered_external_links, {"http://example.org"})
+
+            # Entries cached without external links are rendered again
+            for value in stored.values():
+                del value["external_links"]
+            page.rendered_fragments = None
+            page.rendered_external_links.clear()
+            self.assertEqual(page._render_fragments()["start"], rendered)
+            self.assertEqual(page.rendered_external_links, {"http://example.org"})
+
+
+class TestMarkdownIt(test_utils.MockSiteTestMixin, TestCase):
+    @unittest.skipIf(not HAVE_MARKDOWN_IT, "markdown-it-py is not installed")
+    def test_render(self):
+        files = {
+            "page.md": (
+                "Lead [link](page1.md) with note[^1].\n"
+                "\n"
+                "____\n"
+                "\n"
+                "```python\n"
+                "x = 1\n"
+                "```\n"
+                "\n"
+                "[^1]: first\n"
+            ),
+            "page1.md": "[ext](http://example.org) [back](/page.md)\n",
+        }
+        with self.site(files, settings={"MARKDOWN_BACKEND": "markdown-it"}) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+            feature = mocksite.site.features["md"]
+            self.assertIs(feature.renderer_cls, MarkdownItRenderer)
+
+            fragments = page._render_fragments()
+            self.assertEqual(
+                fragments["start"],
+                '<p>Lead <a href="/page1">link</a> with note<sup class="footnote-ref">'
+                '<a href="#fn1" id="fnref1">[1]</a></sup>.</p>',
+            )
+            self.assertTrue(fragments["rest"].startswith("<hr>\n"))
+            self.assertIn('<div class="codehilite"><pre>', fragments["rest"])
+            self.assertIn('<span class="n">x</span>', fragments["rest"])
+            self.assertTrue(
+                fragments["footnotes"].startswith('<hr class="footnotes-sep">')
+            )
+            self.assertTrue(fragments["rest"].endswith(fragments["footnotes"]))
+            self.assertEqual(fragments["inline_footnotes"], fragments["footnotes"])
+            self.assertEqual(fragments["continue_url"], "/page")
+
+            self.assertEqual(
+                page1._render_fragments(absolute=True)["start"],
+                '<p><a href="http://example.org">ext</a>'
+                ' <a href="https://www.example.org/page">back</a></p>',
+            )
+            self.assertEqual(page1.rendered_external_links, {"http://example.org"})
+
+            self.assertEqual(
+                feature.render_snippet(page1, "*[a](page.md)*"),
+                '<p><em><a href="/page">a</a></em></p>',
+            )
+
+    def test_unknown_backend(self):
+        with self.assertRaisesRegex(RuntimeError, "unsupported markdown backend"):
+            with self.site({"index.md": {}}, settings={"MARKDOWN_BACKEND": "none"}):
+                pass
@@ -65,6 +65,62 @@ title: Test1 title
             self.assertEqual(mocksite.page("dir1/dir2").site_name, "dir2 site")
             self.assertEqual(mocksite.page("dir1/dir2/page").site_name, "dir2 site")
 
+    def test_inherited_table(self):
+        files = {
+            ".staticsite": {
+                "site_name": "Root site",
+            },
+            "dir1/page.md": {},
+            "dir1/page1.md": {"site_name": "Page 1 site"},
+        }
+
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("dir1/page", "dir1/page1")
+            node = page.node
+
+            # Nodes that do not override inherited values share their
+            # parent's table
+            self.assertIs(
+                node.get_inherited_values(), mocksite.site.root.get_inherited_values()
+            )
+            self.assertEqual(page.site_name, "Root site")
+            self.assertEqual(page1.site_name, "Page 1 site")
+            # Pages without children do not store a table
+            self.assertNotIn("_inherited", page.__dict__)
+            self.assertIn("_inherited", node.__dict__)
+
+            # Changing an inherited value invalidates the computed tables
+            mocksite.site.root.site_name = "Changed"
+            self.assertEqual(page.site_name, "Changed")
+            self.assertEqual(page1.site_name, "Page 1 site")
+
+            # Changes only rebuild the tables below the changed object
+            root_table = mocksite.site.root.get_inherited_values()
+            page1_table = page1.get_inherited_values()
+            page1.site_name = "Page 1 changed"
+            self.assertEqual(page1.site_name, "Page 1 changed")
+            self.assertIs(mocksite.site.root.get_inherited_values(), root_table)
+            self.assertIs(node.get_inherited_values(), root_table)
+            self.assertIsNot(page1.get_inherited_values(), page1_table)
+            self.assertEqual(
+                page1.get_inherited_values()["site_name"], "Page 1 changed"
+            )
+
+    def test_inherited_table_sites(self):
+        files = {".staticsite": {"site_name": "Root site"}, "page.md": {}}
+        with self.site(files) as mocksite, self.site(files) as mocksite1:
+            page, page1 = mocksite.page("page"), mocksite1.page("page")
+            self.assertEqual(page.site_name, "Root site")
+            generation = mocksite.site.inherited_generation
+            table = page.get_inherited_values()
+
+            # Changes in another site do not invalidate this site's tables
+            mocksite1.site.root.site_name = "Changed"
+            self.assertEqual(page1.site_name, "Changed")
+            self.assertEqual(mocksite.site.inherited_generation, generation)
+            self.assertIs(page.get_inherited_values(), table)
+            self.assertEqual(page.site_name, "Root site")
+
     def test_asset(self):
         self.maxDiff = None
 
@@ -176,6 +232,32 @@ class TestSiteName(test_utils.MockSiteTestMixin, TestCase):
 
 
 class TestFields(test_utils.MockSiteTestMixin, TestCase):
+    def test_rendered_fields(self):
+        files = {
+            "page.md": {
+                "template_title": "Title of {{page.site_path}}",
+                "template_description": "Description of {{page.title}}",
+            },
+            "page1.md": {"template_title": "Title of {{page.site_path}}"},
+        }
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+            rendered_fields = mocksite.site.rendered_fields
+            rendered_fields.clear()
+
+            for i in range(3):
+                self.assertEqual(page.title, "Title of page")
+                self.assertEqual(page.description, "Description of Title of page")
+                self.assertEqual(page.meta["title"], "Title of page")
+                self.assertEqual(page1.title, "Title of page1")
+                self.assertIsNone(page1.description)
+                self.assertEqual(page1.copyright, "© 2019 Test User")
+
+            # Each template is rendered once per page
+            self.assertEqual(
+                rendered_fields, {"title": 2, "description": 1, "copyright": 1}
+            )
+
     def test_date(self):
         self.maxDiff = None
 
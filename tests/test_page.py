@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from unittest import TestCase
 
+from staticsite.site import Path
+
 from . import utils as test_utils
 
 
@@ -35,6 +37,87 @@ class TestPage(test_utils.MockSiteTestMixin, TestCase):
 
             self.assertEqual(lev1page1.resolve_path("/"), index)
 
+    def test_path_index(self):
+        files = {
+            "toplevel.md": {},
+            "lev1/page1.md": {},
+            "lev1/page2.md": {},
+            "lev1/lev2/page1.md": {},
+        }
+        with self.site(files) as mocksite:
+            site = mocksite.site
+            index = site.path_index
+            self.assertIsNotNone(index)
+            targets = [
+                "",
+                "/",
+                ".",
+                "..",
+                "../..",
+                "./page2",
+                "missing",
+                "missing/../toplevel",
+                "lev1/../toplevel.md",
+                "lev2/./page1",
+                "index.html",
+                "lev1/index.html",
+                "toplevel/index.html",
+            ]
+            for page in site.iter_pages():
+                targets.append(page.site_path)
+                targets.append("/" + page.site_path)
+                if page.src is not None:
+                    targets.append(page.src.relpath)
+                    targets.append("/" + page.src.relpath)
+
+            nodes = {page.search_root_node for page in site.iter_pages()}
+            for node in nodes:
+                for target in targets:
+                    path = Path.from_string(target)
+                    self.assertEqual(
+                        index.lookup(node, path),
+                        node._lookup_page(path),
+                        f"{target!r} from {node.path!r}",
+                    )
+
+            # Resolution is memoized by search root node and target
+            lev1page1, lev1page2 = mocksite.page("lev1/page1", "lev1/page2")
+            self.assertIs(lev1page1.search_root_node, lev1page2.search_root_node)
+            self.assertEqual(lev1page1.resolve_path("page2"), lev1page2)
+            self.assertIn((lev1page1.search_root_node, "page2"), index.resolved)
+            index.resolved[(lev1page1.search_root_node, "page2")] = lev1page1
+            self.assertEqual(lev1page2.resolve_path("page2"), lev1page1)
+
+    def test_url_for(self):
+        files = {
+            "index.md": {},
+            "page.md": {},
+            "other/index.md": {"site_url": "https://other.example.org"},
+            "other/page.md": {},
+        }
+        with self.site(files) as mocksite:
+            index, page, other, other_page = mocksite.page(
+                "", "page", "other", "other/page"
+            )
+            self.assertIsNotNone(mocksite.site.path_index)
+            self.assertEqual(index.url_for(page), "/page")
+            self.assertEqual(index.url_for("page.md"), "/page")
+            self.assertEqual(
+                index.url_for(page, absolute=True), "https://www.example.org/page"
+            )
+            self.assertEqual(index.url_for(index), "/")
+            # Pages with a different site_url get absolute urls
+            self.assertEqual(
+                index.url_for(other_page), "https://other.example.org/other/page"
+            )
+            self.assertEqual(other.url_for(other_page), "/other/page")
+
+            # URLs computed with and without the index are the same
+            for p in mocksite.site.iter_pages():
+                self.assertEqual(
+                    mocksite.site.path_index.page_urls(p), p.compute_urls()
+                )
+
     def test_meta(self):
         files = {
             "index.md": {"title": "test"},
@@ -118,3 +201,18 @@ class TestPage(test_utils.MockSiteTestMixin, TestCase):
                     pages.append(page)
             self.assertCountEqual(assets, [asset])
             self.assertCountEqual(pages, [index, tags, lev1page1])
+
+    def test_field_storage(self):
+        files = {
+            "index.md": {"title": "test"},
+        }
+        with self.site(files) as mocksite:
+            index = mocksite.page("")
+
+            # Field values are not stored in __dict__
+            self.assertEqual(len(index._field_values), len(index._fields))
+            for name in index._fields:
+                self.assertNotIn(name, index.__dict__)
+
+            self.assertEqual(index.title, "test")
+            self.assertEqual(index.meta["title"], "test")
@@ -1,7 +1,7 @@
 import re
 from unittest import TestCase
 
-from staticsite.page_filter import PageFilter
+from staticsite.page_filter import PageFilter, compile_page_prefix
 
 from . import utils as test_utils
 
@@ -83,3 +83,214 @@ class TestPageFilter(test_utils.MockSiteTestMixin, TestCase):
             )
             self.assertCountEqual(page.pages, [page1, page2, page3, page4])
             self.assertCountEqual(page1.pages, [page3, page4])
+
+    def test_index(self):
+        files = {
+            "taxonomies/tags.taxonomy": {},
+            "page.md": {"tags": ["a"], "date": "2019-02-01 12:00"},
+            "blog/post1.md": {"tags": ["a", "b"], "date": "2019-02-03 12:00"},
+            "blog/post2.md": {"tags": ["b"], "date": "2019-02-02 12:00"},
+            "blog/post3.md": {"title": "Alpha", "date": "2019-02-02 12:00"},
+            "blog/sub/post4.md": {"tags": ["a"], "date": "2019-01-01 12:00"},
+        }
+        with self.site(files) as mocksite:
+            site = mocksite.site
+            index = site.page_index
+            self.assertIsNotNone(index)
+            blog = site.root.sub["blog"]
+
+            queries = [
+                {},
+                {"path": "blog/*"},
+                {"path": "*/post*"},
+                {"path": "post*", "root": blog},
+                {"path": "sub/*", "root": blog},
+                {"tags": ["a"]},
+                {"tags": ["a", "b"]},
+                {"tags": ["c"]},
+                {"tags": ["a"], "root": blog},
+                {"sort": "date"},
+                {"sort": "-date"},
+                {"sort": "-date", "limit": 2},
+                {"sort": "title", "path": "blog/*"},
+                {"sort": "-syndication_date", "limit": 3},
+                {"sort": "url", "limit": 3},
+                {"sort": "-date", "tags": ["a"], "limit": 2},
+                {"sort": "-date", "root": blog, "limit": 2},
+                {"sort": "date", "path": "blog/*", "limit": 3},
+                {"sort": "-date", "path": "blog/*"},
+                {"allow": mocksite.page("blog/post1", "page")},
+            ]
+
+            for query in queries:
+                with self.subTest(query=query):
+                    indexed = PageFilter(site, **query).filter()
+                    site.page_index = None
+                    try:
+                        walked = PageFilter(site, **query).filter()
+                    finally:
+                        site.page_index = index
+                    self.assertEqual(indexed, walked)
+
+            self.assertEqual(
+                select(mocksite, sort="-date", tags=["a"]),
+                ["blog/post1", "page", "blog/sub/post4"],
+            )
+
+    def test_query_memo(self):
+        files = {
+            "taxonomies/tags.taxonomy": {},
+            "page.md": {"tags": ["a"]},
+            "blog/post1.md": {"tags": ["a", "b"]},
+            "blog/post2.md": {"tags": ["b"]},
+        }
+        with self.site(files) as mocksite:
+            index = mocksite.site.page_index
+            page, post1 = mocksite.page("page", "blog/post1")
+
+            res = page.find_pages(path="blog/*", tags=["b", "a"])
+            self.assertEqual(res, (post1,))
+            self.assertEqual(index.query_misses, 1)
+            self.assertEqual(index.query_hits, 0)
+
+            # Equivalent queries reuse the result
+            self.assertIs(page.find_pages(path="blog/*", tags=("a", "b")), res)
+            self.assertIs(
+                page.find_pages(path="blog/*", sort=None, tags=["a", "b"]), res
+            )
+            self.assertEqual(index.query_misses, 1)
+            self.assertEqual(index.query_hits, 2)
+
+            # Different queries do not
+            self.assertEqual(len(page.find_pages(path="blog/*")), 2)
+            self.assertEqual(index.query_misses, 2)
+
+    def test_path_prefix(self):
+        self.assertEqual(compile_page_prefix("blog/2023/*"), ("blog", "2023"))
+        self.assertEqual(compile_page_prefix("blog/*/index"), ("blog",))
+        self.assertEqual(compile_page_prefix("blog/post"), ("blog",))
+        self.assertEqual(compile_page_prefix("b?og/*"), ())
+        self.assertEqual(compile_page_prefix("*/post"), ())
+        self.assertEqual(compile_page_prefix("post*"), ())
+        self.assertEqual(compile_page_prefix("^blog/2023/"), ())
+        self.assertEqual(compile_page_prefix(re.compile("blog/")), ())
+
+        files = {
+            "page.md": {},
+            "blog/post.md": {},
+            "blog/2023/post1.md": {},
+            "blog/2023/sub/post2.md": {},
+            "blog/2024/post3.md": {},
+        }
+        with self.site(files) as mocksite:
+            site = mocksite.site
+            for indexed in True, False:
+                with self.subTest(indexed=indexed):
+                    index = site.page_index
+                    if not indexed:
+                        site.page_index = None
+                    try:
+                        self.assertCountEqual(
+                            select(mocksite, path="blog/2023/*"),
+                            ["blog/2023/post1", "blog/2023/sub/post2"],
+                        )
+                        self.assertEqual(select(mocksite, path="blog/2025/*"), [])
+                        self.assertEqual(
+                            select(mocksite, path="blog/2024/*"),
+                            ["blog/2024/post3"],
+                        )
+                    finally:
+                        site.page_index = index
+
+    def test_pages_arrange(self):
+        files = {
+            "page.md": {"pages": "blog/*"},
+            "blog/post1.md": {"date": "2019-01-03 12:00"},
+            "blog/post2.md": {"date": "2019-01-01 12:00"},
+            "blog/post3.md": {"date": "2019-01-02 12:00"},
+        }
+        with self.site(files) as mocksite:
+            page, post1, post2, post3 = mocksite.page(
+                "page", "blog/post1", "blog/post2", "blog/post3"
+            )
+            self.assertEqual(page.pages.arrange("-date", 2), [post1, post3])
+            self.assertEqual(page.pages.arrange("-date"), [post1, post3, post2])
+            self.assertEqual(page.pages.arrange("date", 1), [post2])
+            self.assertCountEqual(page.pages.arranged.keys(), ["-date", "date"])
+
+    def test_predicates(self):
+        files = {
+            "taxonomies/tags.taxonomy": {},
+            "page.md": {"date": "2019-01-01 12:00", "author": "Alice"},
+            "blog/post1.md": {"tags": ["a"], "date": "2019-02-01 12:00"},
+            "blog/post2.md": {
+                "date": "2019-03-01 12:00",
+                "author": "Bob",
+                "nav_title": "Second",
+            },
+            "blog/post3.md": {"date": "2019-04-01 12:00", "author": "Alice"},
+            "data.yaml": "---\ndata_type: test\ndate: 2019-02-15 12:00\n",
+            "data1.yaml": "---\ndata_type: other\ndate: 2019-02-16 12:00\n",
+        }
+        with self.site(files) as mocksite:
+            site = mocksite.site
+            index = site.page_index
+
+            queries = [
+                (
+                    {"date_after": "2019-02-01 12:00"},
+                    ["blog/post1", "data", "data1", "blog/post2", "blog/post3"],
+                ),
+                ({"date_before": "2019-02-01 12:00"}, ["page"]),
+                (
+                    {
+                        "date_after": "2019-02-01",
+                        "date_before": "2019-04-01",
+                        "path": "blog/*",
+                    },
+                    ["blog/post1", "blog/post2"],
+                ),
+                ({"data_type": "test"}, ["data"]),
+                ({"data_type": "missing"}, []),
+                ({"fields": {"author": "Alice"}}, ["page", "blog/post3"]),
+                (
+                    {"fields": {"author": "Alice"}, "date_after": "2019-02-01"},
+                    ["blog/post3"],
+                ),
+                ({"has_fields": "nav_title"}, ["blog/post2"]),
+                (
+                    {
+                        "has_fields": ["nav_title", "author"],
+                        "fields": {"author": "Alice"},
+                    },
+                    [],
+                ),
+                ({"tags": ["a"], "date_before": "2019-03-01"}, ["blog/post1"]),
+            ]
+
+            for query, expected in queries:
+                for indexed in True, False:
+                    with self.subTest(query=query, indexed=indexed):
+                        if not indexed:
+                            site.page_index = None
+                        try:
+                            self.assertEqual(
+                                select(mocksite, sort="date", **query), expected
+                            )
+                        finally:
+                            site.page_index = index
+
+    def test_invalid_dates(self):
+        with self.site({"page.md": {}}) as mocksite:
+            site = mocksite.site
+            for query in (
+                {"date_after": "2019-13-01"},
+                {"date_before": "yesterday-ish"},
+                {"date_after": ""},
+                {"date_before": 2019},
+            ):
+                with self.subTest(query=query):
+                    name, value = next(iter(query.items()))
+                    with self.assertRaisesRegex(ValueError, name) as cm:
+                        PageFilter(site, **query)
+                    self.assertIn(repr(value), str(cm.exception))
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import io
 import os
-from unittest import TestCase
+import tempfile
+from unittest import TestCase, mock
+
+import pygments
+
+from staticsite import cache as ss_cache
+from staticsite.cache import DisabledCache
+from staticsite.features import rst
+from staticsite.site import Site
 
 from . import utils as test_utils
 
@@ -86,3 +95,161 @@ Example blog post in reStructuredText
                     "type": "rst",
                 },
             )
+
+    def test_highlight_cache(self):
+        doc = """
+Title
+=====
+
+.. code:: python
+
+   def f():
+       return 1
+
+.. role:: py(code)
+   :language: python
+
+Inline :py:`x = 1` code.
+"""
+        with self.site({"index.rst": "Title\n=====\n"}) as mocksite:
+            feature = mocksite.site.features["rst"]
+            with mock.patch("pygments.lex", side_effect=pygments.lex) as lex:
+                meta, doctree_scan = feature.parse_rest(io.StringIO(doc))
+                self.assertEqual(lex.call_count, 2)
+                # Code is lexed only the first time it is seen
+                meta, doctree_scan1 = feature.parse_rest(io.StringIO(doc))
+                self.assertEqual(lex.call_count, 2)
+
+            self.assertEqual(
+                doctree_scan.doctree.pformat(), doctree_scan1.doctree.pformat()
+            )
+            self.assertIn('<inline classes="keyword">', doctree_scan.doctree.pformat())
+
+        # docutils is left as it was outside of parsing
+        import docutils.parsers.rst.directives.body
+        import docutils.parsers.rst.roles
+        import docutils.utils.code_analyzer
+
+        for module in docutils.parsers.rst.directives.body, docutils.parsers.rst.roles:
+            self.assertIs(module.Lexer, docutils.utils.code_analyzer.Lexer)
+
+    def test_doctree_cache(self):
+        files = {
+            "taxonomies/tags.taxonomy": {},
+            "index.rst": ":description: Index\n\nIndex\n=====\n\nText.\n",
+            "page.rst": ":tags: [example]\n\nPage\n====\n\nSee `index <index.rst>`_.\n",
+        }
+        opened = []
+
+        class TrackedCache(ss_cache.CacheImplementation):
+            def __init__(self, fname: str):
+                super().__init__(fname)
+                opened.append(self)
+
+        with (
+            mock.patch("staticsite.cache.CacheImplementation", TrackedCache),
+            self.site(files, settings={"CACHE_REBUILDS": True}) as mocksite,
+        ):
+            try:
+                page = mocksite.page("page")
+                rendered = page._render_page()
+
+                site = Site(
+                    mocksite.settings, generation_time=mocksite.site.generation_time
+                )
+                with mock.patch(
+                    "staticsite.features.rst.parse_doctree",
+                    side_effect=rst.parse_doctree,
+                ) as parse_doctree:
+                    with test_utils.mock_file_stat(
+                        {"st_mtime": mocksite.mock_file_mtime}
+                    ):
+                        site.load()
+                # Unchanged documents are not parsed again
+                self.assertEqual(parse_doctree.call_count, 0)
+
+                index = site.root.resolve_path("")
+                page = site.root.resolve_path("page")
+                self.assertEqual(index.description, "Index")
+                self.assertEqual(page.title, "Page")
+                self.assertEqual([c.name for c in page.tags], ["example"])
+                # Renderings are reused without parsing the document again
+                self.assertIsNone(page.doctree_scan)
+                self.assertEqual(page._render_page(), rendered)
+                self.assertIsNone(page.doctree_scan)
+
+                # Documents are parsed when they need to be rendered
+                page.feature.render_cache = DisabledCache("")
+                self.assertEqual(page._render_page(), rendered)
+                self.assertIsNotNone(page.doctree_scan)
+            finally:
+                for c in opened:
+                    if "db" in c.__dict__:
+                        c.db.close()
+
+    def test_settings_not_shared(self):
+        self.assertIsNot(rst.parser_settings(), rst.parser_settings())
+        self.assertIsNot(rst.writer_settings(), rst.writer_settings())
+
+        defaults = (rst._default_parser_settings(), rst._default_writer_settings())
+        before = [repr(d.__dict__) for d in defaults]
+        files = {"page.rst": "Page\n====\n\nText.\n"}
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            page._render_page()
+        # Per-document state is not written into the shared defaults
+        self.assertEqual([repr(d.__dict__) for d in defaults], before)
+
+    def test_docutils_config(self):
+        files = {"page.rst": 'Page\n====\n\nSome "quoted" text.\n'}
+        with tempfile.TemporaryDirectory() as workdir:
+            config = os.path.join(workdir, "docutils.conf")
+            with open(config, "wt") as fd:
+                fd.write("[restructuredtext parser]\nsmart_quotes: yes\n")
+
+            rst._default_parser_settings.cache_clear()
+            try:
+                with (
+                    mock.patch.dict(os.environ, DOCUTILSCONFIG=config),
+                    self.site(files) as mocksite,
+                ):
+                    page = mocksite.page("page")
+                    self.assertIn("\u201cquoted\u201d", page._render_page())
+            finally:
+                rst._default_parser_settings.cache_clear()
+
+    def test_corrupt_meta_cache(self):
+        files = {"page.rst": "Page\n====\n\nText.\n"}
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            feature = page.feature
+            digest = feature.source_digest(page.src)
+            for entry in (
+                {"digest": digest, "meta": "garbage"},
+                {"digest": digest, "meta": {"title": ["not", "a", "string"]}},
+                {"digest": digest},
+                {"meta": {"title": "Page"}},
+                "garbage",
+            ):
+                with self.subTest(entry=entry):
+                    feature.meta_cache = mock.Mock(get=lambda relpath: entry)
+                    self.assertIsNone(feature.load_cached(page.src))
+                    self.assertFalse(feature.is_cached(page.src))
+
+            feature.meta_cache = mock.Mock(
+                get=lambda relpath: {"digest": digest, "meta": {"title": "Page"}}
+            )
+            self.assertEqual(feature.load_cached(page.src), {"title": "Page"})
+
+    def test_link_modes(self):
+        files = {
+            "index.rst": "Index\n=====\n\nText.\n",
+            "page.rst": "Page\n====\n\nSee `index <index.rst>`_.\n",
+        }
+        with self.site(files) as mocksite:
+            page = mocksite.page("page")
+            self.assertIn('href="/"', page._render_page())
+            self.assertIn(
+                'href="https://www.example.org/"', page._render_page(absolute=True)
+            )
+            self.assertIn('href="/"', page._render_page())
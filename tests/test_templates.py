@@ -1,6 +1,11 @@
+import io
 import os
-from unittest import TestCase
+from unittest import TestCase, mock
 
+import jinja2
+
+from staticsite.page import ChangeExtent
+from staticsite.site import Site
 from staticsite.theme import Theme
 
 from . import utils as test_utils
@@ -218,3 +223,196 @@ class TestTemplates(test_utils.MockSiteTestMixin, TestCase):
 
             rendered = page.render().content()
             self.assertEqual(b"", rendered)
+
+
+class TestFragmentCache(test_utils.MockSiteTestMixin, TestCase):
+    def test_cache(self):
+        files = {
+            "index.md": {},
+            "page.md": {},
+            "page1.md": {},
+        }
+        with self.site(files) as mocksite:
+            site = mocksite.site
+            index, page, page1 = mocksite.page("", "page", "page1")
+            fragment_cache = site.theme.fragment_cache
+            rendered: list[str] = []
+
+            def track(path: str) -> str:
+                rendered.append(path)
+                return ""
+
+            site.theme.jinja2.globals["track"] = track
+            tpl = site.theme.jinja2.from_string(
+                "{% cache 'nav', page %}{{track(page.site_path)}}"
+                "<a href='{{url_for(page)}}'>{{page.title}}</a>{% endcache %}"
+            )
+
+            self.assertEqual(tpl.render(page=page), "<a href='/page'>Test site</a>")
+            self.assertEqual(tpl.render(page=page), "<a href='/page'>Test site</a>")
+            self.assertEqual(tpl.render(page=page1), "<a href='/page1'>Test site</a>")
+            self.assertEqual(rendered, ["page", "page1"])
+            self.assertEqual(fragment_cache.hits, 1)
+            self.assertEqual(fragment_cache.misses, 2)
+
+            # A different block with the same key is rendered separately
+            tpl1 = site.theme.jinja2.from_string(
+                "{% cache 'nav', page %}<b>{{page.site_path}}</b>{% endcache %}"
+            )
+            self.assertEqual(tpl1.render(page=page), "<b>page</b>")
+
+    def test_persist(self):
+        files = {"page.md": {}}
+        with self.site(files, settings={"JINJA2_PERSIST_FRAGMENTS": True}) as mocksite:
+            page = mocksite.page("page")
+            fragment_cache = mocksite.site.theme.fragment_cache
+            stored: dict[str, str] = {}
+            fragment_cache.cache = mock.Mock(get=stored.get, put=stored.__setitem__)
+            tpl = mocksite.site.theme.jinja2.from_string(
+                "{% cache 'title', page %}<b>{{page.site_path}}</b>{% endcache %}"
+            )
+            self.assertEqual(tpl.render(page=page), "<b>page</b>")
+            self.assertEqual(len(stored), 1)
+
+            # Persisted fragments are used if the referenced pages did not change
+            for key in stored:
+                stored[key] = "<i>cached</i>"
+            fragment_cache.fragments.clear()
+            with mock.patch.dict(page.__dict__, change_extent=ChangeExtent.UNCHANGED):
+                self.assertEqual(tpl.render(page=page), "<i>cached</i>")
+
+            fragment_cache.fragments.clear()
+            with mock.patch.dict(page.__dict__, change_extent=ChangeExtent.ALL):
+                self.assertEqual(tpl.render(page=page), "<b>page</b>")
+
+    def test_persist_templates_changed(self):
+        files = {
+            "content/page.md": {},
+            "theme/config": "extends: default\n",
+            "theme/inc.html": "<b>old</b>",
+        }
+        settings = {
+            "CONTENT": "content",
+            "THEME": ["theme"],
+            "JINJA2_PERSIST_FRAGMENTS": True,
+        }
+        stored: dict[str, str] = {}
+        source = "{% cache 'inc', page %}{% include 'inc.html' %}{% endcache %}"
+
+        def render(site: Site) -> str:
+            site.theme.fragment_cache.cache = mock.Mock(
+                get=stored.get, put=stored.__setitem__
+            )
+            page = site.root.resolve_path("page")
+            with mock.patch.dict(page.__dict__, change_extent=ChangeExtent.UNCHANGED):
+                return site.theme.jinja2.from_string(source).render(page=page)
+
+        with self.site(files, settings=settings) as mocksite:
+
+            def reload(site: Site) -> Site:
+                site = Site(site.settings, generation_time=site.generation_time)
+                with test_utils.mock_file_stat({"st_mtime": mocksite.mock_file_mtime}):
+                    site.load()
+                return site
+
+            self.assertEqual(render(mocksite.site), "<b>old</b>")
+            self.assertEqual(len(stored), 1)
+
+            # Fragments are reused across builds if no template changed
+            for key in stored:
+                stored[key] = "<i>cached</i>"
+            self.assertEqual(render(reload(mocksite.site)), "<i>cached</i>")
+
+            # Editing an included template invalidates persisted fragments
+            with open(os.path.join(mocksite.root, "theme", "inc.html"), "w") as fd:
+                fd.write("<b>changed</b>")
+            self.assertEqual(render(reload(mocksite.site)), "<b>changed</b>")
+
+
+class TestTemplateProfiler(test_utils.MockSiteTestMixin, TestCase):
+    def test_profile(self):
+        files = {"index.md": {}, "page.md": "text\n"}
+        with self.site(files, settings={"JINJA2_PROFILE": True}) as mocksite:
+            profiler = mocksite.site.theme.template_profiler
+            self.assertIsNotNone(profiler)
+            page = mocksite.page("page")
+            page.render()
+            page.render()
+
+            self.assertEqual(profiler.calls["page.html"], 2)
+            self.assertEqual(profiler.calls["default/page.html:page_content"], 2)
+            self.assertEqual(profiler.stack, [])
+            for name, elapsed in profiler.inclusive.items():
+                self.assertLessEqual(profiler.exclusive[name], elapsed)
+            self.assertEqual(
+                sum(profiler.stacks.values()), sum(profiler.exclusive.values())
+            )
+            # Templates are nested in the templates that extend them
+            self.assertIn(
+                ("page.html", "default/page.html", "base.html"), profiler.stacks
+            )
+
+            out = io.StringIO()
+            profiler.write_collapsed(out)
+            lines = out.getvalue().splitlines()
+            self.assertIn(
+                "page.html;default/page.html;base.html",
+                [line.rsplit(" ", 1)[0] for line in lines],
+            )
+            for line in lines:
+                self.assertRegex(line, r"^\S+ \d+$")
+
+    def test_super(self):
+        with self.site({}, settings={"JINJA2_PROFILE": True}) as mocksite:
+            theme = mocksite.site.theme
+            theme.jinja2.loader.loader_theme = jinja2.DictLoader(
+                {"base.html": "<{% block title %}base{% endblock %}>"}
+            )
+            tpl = theme.from_string(
+                "{% extends 'base.html' %}"
+                "{% block title %}child {{super()}}{% endblock %}"
+            )
+            # Instrumenting twice is harmless
+            self.assertIs(theme.template_profiler.instrument(tpl), tpl)
+            self.assertEqual(tpl.render(), "<child base>")
+            self.assertEqual(
+                theme.template_profiler.calls,
+                {
+                    "(string)": 1,
+                    "base.html": 1,
+                    "(string):title": 1,
+                    "base.html:title": 1,
+                },
+            )
+
+    def test_disabled(self):
+        with self.site({"index.md": {}}) as mocksite:
+            self.assertIsNone(mocksite.site.theme.template_profiler)
+
+
+class TestCompiledTemplates(test_utils.MockSiteTestMixin, TestCase):
+    def test_from_string(self):
+        files = {
+            "page.md": {"template_title": "Title of {{page.site_path}}"},
+            "page1.md": {"template_title": "Title of {{page.site_path}}"},
+        }
+        with self.site(files) as mocksite:
+            page, page1 = mocksite.page("page", "page1")
+            theme = mocksite.site.theme
+            # The same source is compiled only once
+            self.assertIs(page.meta["template_title"], page1.meta["template_title"])
+            self.assertIs(
+                theme.from_string("Title of {{page.site_path}}"),
+                page.meta["template_title"],
+            )
+            self.assertEqual(page.title, "Title of page")
+            self.assertEqual(page1.title, "Title of page1")
+
+            with mock.patch.object(
+                theme.jinja2, "from_string", side_effect=theme.jinja2.from_string
+            ) as from_string:
+                self.assertIsNot(
+                    theme.from_string("other"), page.meta["template_title"]
+                )
+                theme.from_string("other")
+            self.assertEqual(from_string.call_count, 1)
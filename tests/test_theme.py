@@ -1,4 +1,10 @@
-from unittest import TestCase
+import os
+from unittest import TestCase, mock
+
+import jinja2
+
+from staticsite import cache as ss_cache
+from staticsite.site import Site
 
 from . import utils as test_utils
 
@@ -111,3 +117,63 @@ class TestMarkdownFilter(test_utils.MockSiteTestMixin, TestCase):
                 res,
                 '<p><em>This</em> is an <a href="http://example.org">example</a></p>',
             )
+
+
+class TestBytecodeCache(test_utils.MockSiteTestMixin, TestCase):
+    def test_cache(self):
+        files = {"index.md": {}}
+        opened: list[ss_cache.Cache] = []
+
+        class TrackedCache(ss_cache.CacheImplementation):
+            def __init__(self, fname: str):
+                super().__init__(fname)
+                opened.append(self)
+
+        with (
+            mock.patch("staticsite.cache.CacheImplementation", TrackedCache),
+            self.site(files, settings={"CACHE_REBUILDS": True}) as mocksite,
+        ):
+            try:
+                site = mocksite.site
+                cache_dir = os.path.join(
+                    site.settings.PROJECT_ROOT, ".staticsite-cache", "jinja2"
+                )
+                self.assertIsInstance(
+                    site.theme.jinja2.bytecode_cache, jinja2.FileSystemBytecodeCache
+                )
+                site.theme.jinja2.get_template("page.html")
+                self.assertTrue(os.listdir(cache_dir))
+
+                # A new build loads compiled templates from the cache
+                site = Site(mocksite.settings, generation_time=site.generation_time)
+                with test_utils.mock_file_stat({"st_mtime": mocksite.mock_file_mtime}):
+                    site.load()
+                with mock.patch.object(
+                    site.theme.jinja2,
+                    "compile",
+                    side_effect=site.theme.jinja2.compile,
+                ) as compile:
+                    site.theme.jinja2.get_template("page.html")
+                self.assertEqual(compile.call_count, 0)
+
+                # Sandboxed and unsandboxed environments use different entries
+                mocksite.settings.JINJA2_SANDBOXED = not site.settings.JINJA2_SANDBOXED
+                site = Site(mocksite.settings, generation_time=site.generation_time)
+                with test_utils.mock_file_stat({"st_mtime": mocksite.mock_file_mtime}):
+                    site.load()
+                with mock.patch.object(
+                    site.theme.jinja2,
+                    "compile",
+                    side_effect=site.theme.jinja2.compile,
+                ) as compile:
+                    site.theme.jinja2.get_template("page.html")
+                self.assertEqual(compile.call_count, 1)
+            finally:
+                # Close the databases before their directory is removed
+                for c in opened:
+                    if "db" in c.__dict__:
+                        c.db.close()
+
+    def test_disabled(self):
+        with self.site({"index.md": {}}) as mocksite:
+            self.assertIsNone(mocksite.site.theme.jinja2.bytecode_cache)